@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+
+# Time and peak memory of every stage of parse-page.py,
+# on the committed tournament files and on bigger synthetic ones
+
+import argparse
+from collections import namedtuple
+import datetime
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+
+def import_script(module_name, filename):
+    # The scripts are not importable by name
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(script_directory, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+parse_page = import_script("parse_page", "parse-page.py")
+generate_thread = import_script("generate_thread", "generate-thread.py")
+
+StageResult = namedtuple("StageResult", ["scenario", "stage", "seconds", "peak_bytes"])
+
+######################################
+# scenarios
+# Every scenario writes thread.html, tournament.txt and aux-data.json
+# into the given directory; the synthetic ones come from generate-thread.py
+
+def write_real_scenario(directory, thread_copies = 1):
+    # The committed files, with the thread repeated `thread_copies` times
+    # (the comments parser does not mind the repeated page structure)
+    with open(os.path.join(script_directory, "thread.html"), "rb") as file:
+        thread_bytes = file.read()
+    with open(os.path.join(directory, "thread.html"), "wb") as file:
+        for _ in range(thread_copies):
+            file.write(thread_bytes)
+
+    for filename in ("tournament.txt", "aux-data.json"):
+        with open(os.path.join(script_directory, filename), "rb") as file:
+            file_bytes = file.read()
+        with open(os.path.join(directory, filename), "wb") as file:
+            file.write(file_bytes)
+
+scenarios = {
+    "real" : lambda directory: write_real_scenario(directory),
+    "real-x10" : lambda directory: write_real_scenario(directory, thread_copies = 10),
+    "real-x100" : lambda directory: write_real_scenario(directory, thread_copies = 100),
+    "16-players-30-rounds" : lambda directory: generate_thread.generate_tournament(directory,
+        authors_count = 150, players_count = 16, rounds_count = 30),
+    "32-players-30-rounds" : lambda directory: generate_thread.generate_tournament(directory,
+        authors_count = 150, players_count = 32, rounds_count = 30),
+    # For the chances to win
+    "16-players-30-rounds-2-unplayed" : lambda directory: generate_thread.generate_tournament(directory,
+        authors_count = 150, players_count = 16, rounds_count = 30, unplayed_rounds_count = 2),
+    }
+
+######################################
+# stages
+
+def run_pipeline(directory, measure):
+    # Same steps as the main of parse-page.py;
+    # `measure(stage, function, *args)` calls the function and returns its result
+    masters_appellatives, tournament_data = parse_page.load_aux_data(os.path.join(directory, "aux-data.json"))
+
+    with open(os.path.join(directory, "tournament.txt"), "rb") as file:
+        tournament_text = file.read().decode("utf-8", "ignore")
+    tournament_post = parse_page.Post(
+        author = "Official results",
+        date = datetime.datetime(1817, 10, 10),
+        text = tournament_text)
+
+    posts = measure("load_posts", parse_page.load_posts,
+        os.path.join(directory, "thread.html"), tournament_data.should_ignore_post, tournament_data.team_names)
+    posts = posts + tournament_data.post_corrections
+
+    posts_results = measure("extract_predictions", parse_page.parse_posts,
+        posts, masters_appellatives, tournament_data)
+    official_results, _, _ = parse_page.parse_post(tournament_post, masters_appellatives, tournament_data)
+
+    all_rankings = [
+        post_ranking
+        for _, post_ranking, _ in posts_results
+        if post_ranking is not None ]
+
+    # normalise_predictions is a generator, consumed by build_prediction_table
+    prediction_table = measure("normalise_predictions", parse_page.build_prediction_table,
+        parse_page.normalise_predictions(official_results, (
+            prediction
+            for post_predictions, _, _ in posts_results
+            for prediction in post_predictions )))
+
+    prediction_table = measure("assign_prediction_scores", parse_page.assign_prediction_scores,
+        prediction_table, tournament_data.scoring_matrix, tournament_data.masters_scoring_bonuses)
+
+    round_entries = measure("calculate_round_entries", parse_page.calculate_round_entries,
+        prediction_table, tournament_data)
+
+    # As in a later run of --incremental, with the finished rounds frozen
+    _, _, frozen_rounds = parse_page.calculate_round_entries_memoized(prediction_table, tournament_data, {})
+    measure("calculate_round_entries_memoized", parse_page.calculate_round_entries_memoized,
+        prediction_table, tournament_data, frozen_rounds)
+    ranking_scores = measure("assign_ranking_scores", parse_page.assign_ranking_scores, all_rankings, tournament_data)
+    standings_index = measure("build_standings_index", parse_page.build_standings_index, round_entries)
+    measure("calculate_grand_total_entries", parse_page.calculate_grand_total_entries,
+        standings_index, ranking_scores)
+    measure("simulate_chances", parse_page.simulate_chances,
+        prediction_table, standings_index, ranking_scores, tournament_data, 100000, random.Random(1817))
+    measure("analyse_contenders", parse_page.analyse_contenders,
+        prediction_table, standings_index, ranking_scores, tournament_data, random.Random(1817))
+
+def benchmark_scenario(scenario, directory, repeat):
+    best_seconds = {}
+    peak_bytes = {}
+
+    def measure_time(stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        seconds = time.perf_counter() - start
+        best_seconds[stage] = min(seconds, best_seconds.get(stage, seconds))
+        return result
+
+    def measure_memory(stage, function, *args):
+        tracemalloc.reset_peak()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        result = function(*args)
+        _, stage_peak_bytes = tracemalloc.get_traced_memory()
+        peak_bytes[stage] = stage_peak_bytes - start_bytes
+        return result
+
+    for _ in range(repeat):
+        run_pipeline(directory, measure_time)
+
+    # Separate run, as tracing slows down the allocations
+    tracemalloc.start()
+    try:
+        run_pipeline(directory, measure_memory)
+    finally:
+        tracemalloc.stop()
+
+    return [
+        StageResult(scenario = scenario, stage = stage, seconds = seconds, peak_bytes = peak_bytes[stage])
+        for stage, seconds in best_seconds.items() ]
+
+######################################
+# main
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description = "Time and peak memory of every stage of parse-page.py")
+    argument_parser.add_argument("--scenario", action = "append", choices = list(scenarios.keys()),
+        help = "scenario to run, can be repeated (default: all)")
+    argument_parser.add_argument("--repeat", type = int, default = 3,
+        help = "timing runs per scenario, the best is reported (default: %(default)s)")
+    argument_parser.add_argument("--json",
+        help = "also write the results to this JSON file")
+    arguments = argument_parser.parse_args()
+
+    # The pipeline warnings are not interesting here
+    sys.stderr = open(os.devnull, "w")
+
+    all_results = []
+    for scenario in arguments.scenario or scenarios.keys():
+        with tempfile.TemporaryDirectory() as directory:
+            scenarios[scenario](directory)
+            scenario_results = benchmark_scenario(scenario, directory, arguments.repeat)
+
+        for result in scenario_results:
+            print("{:<32} {:<34} {:>9.3f} s {:>10.1f} MiB".format(
+                result.scenario, result.stage, result.seconds, result.peak_bytes / 2**20), flush = True)
+        all_results.extend(scenario_results)
+
+    if arguments.json:
+        with open(arguments.json, "w", encoding = "utf-8") as file:
+            json.dump([ result._asdict() for result in all_results ], file, indent = 4)
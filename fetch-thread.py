@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+
+# Download a comments thread split over several WordPress pages
+# (".../comment-page-N/"), concurrently over a few keep-alive connections,
+# and save all pages, in order, as a single thread.html
+
+import argparse
+import concurrent.futures
+import http.client
+import os
+import re
+import threading
+import urllib.error
+import urllib.parse
+
+user_agent = "Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.9.0.7) Gecko/2009021910 Firefox/3.0.7"
+
+######################################
+
+class ConnectionPool:
+    # One persistent HTTP connection per (thread, host); the downloads
+    # run on the same `connections_count` threads for the whole life
+    # of the pool, so the connections are bounded and reused across calls
+
+    def __init__(self, connections_count = 4, timeout = 30):
+        self.timeout = timeout
+        self.thread_local = threading.local()
+        self.all_connections = []
+        self.lock = threading.Lock()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers = connections_count)
+
+    def get_connection(self, scheme, netloc):
+        connections = self.thread_local.__dict__.setdefault("connections", {})
+        if (scheme, netloc) not in connections:
+            connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connection = connection_class(netloc, timeout = self.timeout)
+            connections[(scheme, netloc)] = connection
+            with self.lock:
+                self.all_connections.append(connection)
+        return connections[(scheme, netloc)]
+
+    def drop_connection(self, scheme, netloc):
+        connection = self.thread_local.connections.pop((scheme, netloc))
+        connection.close()
+
+    def get(self, url, headers = {}, max_redirects = 5):
+        # Returns (final url, status, headers, body)
+        for _ in range(max_redirects + 1):
+            url_parts = urllib.parse.urlsplit(url)
+            path = urllib.parse.urlunsplit(("", "", url_parts.path or "/", url_parts.query, ""))
+            request_headers = dict(headers, **{ "User-Agent" : user_agent })
+
+            # A kept-alive connection may have been closed by the server
+            # in the meantime: in that case, retry once on a new one
+            for attempt in range(2):
+                connection = self.get_connection(url_parts.scheme, url_parts.netloc)
+                try:
+                    connection.request("GET", path, headers = request_headers)
+                    response = connection.getresponse()
+                    body = response.read()
+                    break
+                except (http.client.HTTPException, OSError):
+                    # Also after a timeout, which leaves the connection
+                    # in the middle of a response
+                    self.drop_connection(url_parts.scheme, url_parts.netloc)
+                    if attempt == 1:
+                        raise
+
+            if response.status in (301, 302, 303, 307, 308) and response.headers.get("Location"):
+                url = urllib.parse.urljoin(url, response.headers["Location"])
+                continue
+
+            if response.status not in (200, 304):
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+
+            return url, response.status, response.headers, body
+
+        raise urllib.error.URLError("Too many redirects for {}".format(url))
+
+    def close(self):
+        self.executor.shutdown()
+        with self.lock:
+            for connection in self.all_connections:
+                connection.close()
+            self.all_connections = []
+
+######################################
+
+comment_page_re = re.compile(r"""href=["']([^"'#]*?comment-page-(\d+)/?)[#"']""")
+
+# The page being shown is not a link: <span class="page-numbers current">3</span>
+current_page_re = re.compile(r"""<span[^>]*\bcurrent\b[^>]*>\s*(\d+)\s*</span>""")
+
+def get_comment_pages_urls(page_html):
+    # URLs of all the comment pages, in order, with None for the page
+    # `page_html` itself; empty if the thread fits in one page.
+    # The pagination may skip some pages ("1 2 … 7 8"): these are
+    # built from the URL of another page
+    linked_pages = {}  # page number --> URL
+    for match in comment_page_re.finditer(page_html):
+        linked_pages[int(match.group(2))] = match.group(1)
+
+    if len(linked_pages) == 0:
+        return []
+
+    # The thread URL shows the newest page, so this is often the last one;
+    # without a marked current page, it is taken as the one after the last link
+    current_page_match = current_page_re.search(page_html)
+    current_page_number = (
+        int(current_page_match.group(1)) if current_page_match
+        else max(linked_pages.keys()) + 1)
+
+    url_template = next(iter(linked_pages.values()))
+    return [
+        None if page_number == current_page_number
+        else linked_pages.get(page_number,
+            re.sub(r"comment-page-\d+", "comment-page-{}".format(page_number), url_template))
+        for page_number in range(1, max(list(linked_pages.keys()) + [ current_page_number ]) + 1) ]
+
+def fetch_page(connection_pool, url, pages_cache):
+    # Conditional GET, reusing the body in `pages_cache`
+    # (url --> (etag, last modified, body)) if the page did not change
+    headers = {}
+    if url in pages_cache:
+        etag, last_modified, _ = pages_cache[url]
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    _, status, response_headers, body = connection_pool.get(url, headers)
+    if status == 304 and url not in pages_cache:
+        # A 304 to a request that was not conditional (a misbehaving
+        # server or cache in between): ask once more, then fail, so
+        # that the caller retries later instead of crashing
+        _, status, response_headers, body = connection_pool.get(url)
+        if status == 304:
+            raise urllib.error.HTTPError(url, status, "Not Modified, without a cached copy", response_headers, None)
+    if status == 304:
+        return pages_cache[url][2]
+
+    pages_cache[url] = (response_headers.get("ETag"), response_headers.get("Last-Modified"), body)
+    return body
+
+def fetch_thread(url, connection_pool, pages_cache = None):
+    # Returns the bytes of every page of the thread, in order
+    if pages_cache is None:
+        pages_cache = {}
+
+    # Also the first page is downloaded on the threads of the pool,
+    # so that the calling thread does not keep a connection of its own
+    first_page = connection_pool.executor.submit(fetch_page, connection_pool, url, pages_cache).result()
+    pages_urls = [
+        urllib.parse.urljoin(url, page_url) if page_url is not None else None
+        for page_url in get_comment_pages_urls(first_page.decode("utf-8", "ignore")) ]
+
+    if len(pages_urls) == 0:
+        return [ first_page ]
+
+    return list(connection_pool.executor.map(
+        lambda page_url: fetch_page(connection_pool, page_url, pages_cache) if page_url is not None else first_page,
+        pages_urls))
+
+def save_thread(filename, pages):
+    # load_posts reads the concatenated pages as one stream of comments
+    temporary_filename = filename + ".tmp"
+    with open(temporary_filename, "wb") as file:
+        for page in pages:
+            file.write(page)
+    os.replace(temporary_filename, filename)
+
+######################################
+# main
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description = "Download all the comment pages of a thread into one file")
+    argument_parser.add_argument("url", nargs = "?",
+        default = "https://www.scacchierando.it/fantascacchi/fantacandidati-2026/",
+        help = "first page of the thread (default: %(default)s)")
+    argument_parser.add_argument("--output", default = "thread.html",
+        help = "file to write (default: %(default)s)")
+    argument_parser.add_argument("--connections", type = int, default = 4,
+        help = "concurrent downloads (default: %(default)s)")
+    arguments = argument_parser.parse_args()
+
+    connection_pool = ConnectionPool(arguments.connections)
+    try:
+        pages = fetch_thread(arguments.url, connection_pool)
+    finally:
+        connection_pool.close()
+
+    save_thread(arguments.output, pages)
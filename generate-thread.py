@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+# Generate a synthetic tournament (thread.html, tournament.txt, aux-data.json)
+# in the format read by parse-page.py, for load tests.
+# The output only depends on the arguments, seed included.
+
+import argparse
+import datetime
+import json
+import os
+import random
+
+months = [
+    "gennaio", "febbraio", "marzo", "aprile", "maggio", "giugno",
+    "luglio", "agosto", "settembre", "ottobre", "novembre", "dicembre" ]
+
+# Meaning --> spellings of the outcomes, as written in the thread
+outcomes_spellings = {
+    "1" : [ "1", "1-0", "1 - 0" ],
+    "X" : [ "X", "x", "½-½", "1/2", "patta" ],
+    "2" : [ "2", "0-1", "0 - 1" ],
+    }
+
+dashes = [ " – ", " - ", " — ", " " ]
+
+######################################
+
+def get_masters(players_count, rng):
+    # (name, nicknames) of every master; all name tokens are distinct
+    syllables = [ "ba", "do", "ke", "li", "mu", "na", "po", "ri", "sa", "tu", "ve", "zo", "gra", "ste" ]
+
+    used_tokens = set()
+    def new_token(suffixes):
+        while True:
+            token = ("".join(rng.choice(syllables) for _ in range(rng.randint(2, 3)))
+                + rng.choice(suffixes)).capitalize()
+            # Also avoid the prefixes used as nicknames
+            if token not in used_tokens and token[0:4] not in used_tokens:
+                used_tokens.add(token)
+                used_tokens.add(token[0:4])
+                return token
+
+    masters = []
+    for _ in range(players_count):
+        first_name = new_token([ "o", "a", "er" ])
+        family_name = new_token([ "ov", "in", "ski", "ez", "ani" ])
+        # A short form and a typo
+        nicknames = [ family_name[0:4], family_name[:-2] + family_name[-1] + family_name[-2] ]
+        masters.append(("{} {}".format(first_name, family_name), nicknames))
+    return masters
+
+def get_round_robin_pairings(masters_names, rounds_count):
+    # Circle method, for an even number of masters; in the second cycle
+    # the colors are swapped, so that every game (white, black) is unique
+    # for up to two cycles (a double round-robin)
+    players = list(masters_names)
+    rounds = []
+    while len(rounds) < rounds_count:
+        cycle_index = len(rounds) // (len(players) - 1)
+        pairings = [
+            (players[index], players[-1 - index])
+            for index in range(len(players) // 2) ]
+        if cycle_index % 2 == 1:
+            pairings = [ (black, white) for white, black in pairings ]
+        rounds.append(pairings)
+        players = [ players[0], players[-1] ] + players[1:-1]
+    return rounds
+
+def get_master_appellative(master, nickname_rate, rng):
+    name, nicknames = master
+    if rng.random() < nickname_rate:
+        return rng.choice(nicknames)
+    # The family name alone twice as often as the full name
+    return rng.choices([ name, name.split()[-1] ], weights = [ 1, 2 ])[0]
+
+def get_prediction_line(white, black, outcome, masters, nickname_rate, malformed_rate, rng):
+    white_text = get_master_appellative(white, nickname_rate, rng)
+    black_text = get_master_appellative(black, nickname_rate, rng)
+    outcome_text = rng.choice(outcomes_spellings[outcome])
+
+    if rng.random() < malformed_rate:
+        # A line the parser flags as suspect
+        third_master = rng.choice([ master for master in masters if master not in (white, black) ])
+        third_text = get_master_appellative(third_master, nickname_rate, rng)
+        return rng.choice([
+            "{} {}".format(white_text, outcome_text),  # one master
+            "{} {} {} {}".format(white_text, black_text, third_text, outcome_text),  # three masters
+            "{}{}{} ??".format(white_text, rng.choice(dashes), black_text),  # no outcome
+            ])
+
+    return "{}{}{} {}".format(white_text, rng.choice(dashes), black_text, outcome_text)
+
+def get_post_html(author, date, lines):
+    # Same layout as the WordPress theme of the real thread
+    return (
+        '<li class="comment byuser comment-author-{} even depth-1" id="comment-< ?php comment_ID() ?>">\n'
+        '  <div class="spazio_commenti">\n'
+        '    <div class="info_com" style="display:inline-block;">\n'
+        '      <b>{}</b>\n'
+        '      <br>\n'
+        '      <em>\n'
+        '        {} {} {} -\n'
+        '        {:02d}:{:02d}          </em>\n'
+        '      <p>{}</p>\n'
+        '    </div>\n'
+        '  </div>\n'
+        '</li>\n').format(
+            author.lower(), author, date.day, months[date.month - 1], date.year,
+            date.hour, date.minute, "<br />\n".join(lines))
+
+######################################
+
+def generate_tournament(directory,
+        authors_count = 20,
+        players_count = 8,
+        rounds_count = 14,
+        games_per_round = None,
+        unplayed_rounds_count = 0,
+        nickname_rate = 0.2,
+        ranking_rate = 0.8,
+        malformed_rate = 0.01,
+        resubmission_rate = 0.05,
+        seed = 1817):
+    rng = random.Random(seed)
+
+    masters = get_masters(players_count, rng)
+    masters_by_name = dict((master[0], master) for master in masters)
+    # With fewer games per round than pairs of masters, only the first pairs play
+    if games_per_round is None:
+        games_per_round = players_count // 2
+    rounds = [
+        pairings[:games_per_round]
+        for pairings in get_round_robin_pairings([ name for name, _ in masters ], rounds_count) ]
+    official_outcomes = [
+        [ rng.choice("1X2") for _ in pairings ]
+        for pairings in rounds ]
+
+    os.makedirs(directory, exist_ok = True)
+
+    # tournament.txt: the unplayed games have no result
+    tournament_lines = [ "# Synthetic tournament, seed {}".format(seed) ]
+    for round_index, pairings in enumerate(rounds):
+        is_played = round_index < rounds_count - unplayed_rounds_count
+        tournament_lines.append("")
+        tournament_lines.append("Turno {}".format(round_index + 1))
+        for (white, black), outcome in zip(pairings, official_outcomes[round_index]):
+            tournament_lines.append("{} – {}{}".format(white, black, " " + outcome if is_played else ""))
+    with open(os.path.join(directory, "tournament.txt"), "w", encoding = "utf-8") as file:
+        file.write("\n".join(tournament_lines) + "\n")
+
+    # thread.html: every author posts the predictions of every round,
+    # a few times a second version of them; the ranking comes with the first round
+    authors = [ "autore{:03d}".format(author_index) for author_index in range(authors_count) ]
+    start_date = datetime.datetime(2026, 1, 1, 9, 0)
+    expected_ranking_length = 3
+
+    with open(os.path.join(directory, "thread.html"), "w", encoding = "utf-8") as file:
+        file.write("<html>\n<body>\n<ol class=\"commentlist\">\n")
+        for round_index, pairings in enumerate(rounds):
+            round_date = start_date + datetime.timedelta(days = round_index)
+            for author_index, author in enumerate(authors):
+                post_date = round_date + datetime.timedelta(minutes = author_index)
+                predicted_outcomes = [ rng.choice("1X2") for _ in pairings ]
+
+                lines = [ rng.choice([ "Turno {}", "{}° turno", "Round {}" ]).format(round_index + 1) ]
+                lines.extend(
+                    get_prediction_line(masters_by_name[white], masters_by_name[black], outcome, masters,
+                        nickname_rate, malformed_rate, rng)
+                    for (white, black), outcome in zip(pairings, predicted_outcomes))
+
+                if round_index == 0 and rng.random() < ranking_rate:
+                    lines.append("Classifica:")
+                    ranked_masters = rng.sample(masters, expected_ranking_length)
+                    lines.extend(
+                        "{}. {}".format(position, get_master_appellative(master, nickname_rate, rng))
+                        for position, master in enumerate(ranked_masters, start = 1))
+
+                file.write(get_post_html(author, post_date, lines))
+
+                if rng.random() < resubmission_rate:
+                    # Change of mind: a later post, replacing the first one
+                    for game_index in rng.sample(range(len(pairings)), max(1, len(pairings) // 4)):
+                        predicted_outcomes[game_index] = rng.choice("1X2")
+                    lines = [ "Correggo, turno {}".format(round_index + 1) ]
+                    lines.extend(
+                        get_prediction_line(masters_by_name[white], masters_by_name[black], outcome, masters,
+                        nickname_rate, malformed_rate, rng)
+                        for (white, black), outcome in zip(pairings, predicted_outcomes))
+                    file.write(get_post_html(author, post_date + datetime.timedelta(hours = 2), lines))
+        file.write("</ol>\n</body>\n</html>\n")
+
+    # aux-data.json
+    ranking_masters = rng.sample(masters, expected_ranking_length)
+    aux_data = {
+        "last_checked_post" : "Dubois\n10 ottobre 1817\n19:14\n",
+        "games_per_round" : games_per_round,
+        "scoring_system" : "3_1_4",
+        "expected_ranking_length" : expected_ranking_length,
+        "bonus_for_perfect_round_prediction" : 4,
+        "negate_bonus_if_all_draws" : True,
+        "enable_default_draw_prediction" : 1,
+        "masters_names" : [ name for name, _ in masters ],
+        "masters_scoring_bonuses" : { masters[-1][0] : [ 1, -1 ] },
+        "masters_nicknames" : dict(masters),
+        "official_ranking" : {
+            str(position) : [ master[0] ]
+            for position, master in enumerate(ranking_masters, start = 1) },
+        "ranking_scoring" : { "1" : 6, "2" : 3, "3" : 3, "ranked_incorrect" : 1 },
+        "team_names" : {},
+        "corrections" : [],
+        "posts_string_blacklist" : [],
+        "posts_author_blacklist" : [],
+        }
+    with open(os.path.join(directory, "aux-data.json"), "w", encoding = "utf-8") as file:
+        json.dump(aux_data, file, ensure_ascii = False, indent = 4)
+
+######################################
+# main
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description = "Generate a synthetic tournament for load tests of parse-page.py")
+    argument_parser.add_argument("output_directory",
+        help = "where thread.html, tournament.txt and aux-data.json are written")
+    argument_parser.add_argument("--authors", type = int, default = 20,
+        help = "participants posting predictions (default: %(default)s)")
+    argument_parser.add_argument("--players", type = int, default = 8,
+        help = "masters in the tournament, even, at least 4 (default: %(default)s)")
+    argument_parser.add_argument("--rounds", type = int, default = 14,
+        help = "rounds of the tournament, at most a double round-robin (default: %(default)s)")
+    argument_parser.add_argument("--games-per-round", type = int,
+        help = "games of every round, at most half the masters (default: half the masters)")
+    argument_parser.add_argument("--unplayed-rounds", type = int, default = 0,
+        help = "last rounds without results (default: %(default)s)")
+    argument_parser.add_argument("--nickname-rate", type = float, default = 0.2,
+        help = "share of the masters' mentions using a nickname (default: %(default)s)")
+    argument_parser.add_argument("--ranking-rate", type = float, default = 0.8,
+        help = "share of the authors posting a ranking (default: %(default)s)")
+    argument_parser.add_argument("--malformed-rate", type = float, default = 0.01,
+        help = "share of suspect prediction lines (default: %(default)s)")
+    argument_parser.add_argument("--resubmission-rate", type = float, default = 0.05,
+        help = "share of the posts followed by a corrected one (default: %(default)s)")
+    argument_parser.add_argument("--seed", type = int, default = 1817,
+        help = "random seed (default: %(default)s)")
+    arguments = argument_parser.parse_args()
+
+    # A round-robin pairs all the masters, and repeats the games after two cycles;
+    # the malformed lines with three masters need at least four of them
+    if arguments.players < 4 or arguments.players % 2 != 0:
+        argument_parser.error("--players must be even, and at least 4")
+    if not 1 <= arguments.rounds <= 2 * (arguments.players - 1):
+        argument_parser.error("--rounds must be between 1 and {} (a double round-robin of {} masters)".format(
+            2 * (arguments.players - 1), arguments.players))
+    if not 0 <= arguments.unplayed_rounds <= arguments.rounds:
+        argument_parser.error("--unplayed-rounds must be between 0 and --rounds")
+    if arguments.games_per_round is not None and not 1 <= arguments.games_per_round <= arguments.players // 2:
+        argument_parser.error("--games-per-round must be between 1 and {}".format(arguments.players // 2))
+
+    generate_tournament(arguments.output_directory,
+        authors_count = arguments.authors,
+        players_count = arguments.players,
+        rounds_count = arguments.rounds,
+        games_per_round = arguments.games_per_round,
+        unplayed_rounds_count = arguments.unplayed_rounds,
+        nickname_rate = arguments.nickname_rate,
+        ranking_rate = arguments.ranking_rate,
+        malformed_rate = arguments.malformed_rate,
+        resubmission_rate = arguments.resubmission_rate,
+        seed = arguments.seed)
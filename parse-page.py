@@ -1,24 +1,39 @@
 #!/usr/bin/env python3
 
-from bs4 import BeautifulSoup
-from collections import namedtuple
+import argparse
+import array
+import codecs
+import cProfile
+from collections import Counter, defaultdict, namedtuple
+import concurrent.futures
 import datetime
 from enum import Enum
+import functools
+import hashlib
+import html.parser
+import itertools
 import json
-from operator import itemgetter
+import math
+from operator import and_, eq, itemgetter
+import os
+import random
 import re as re
+import time
+import tracemalloc
 
 Post = namedtuple("Post", ["author", "date", "text"])
 Prediction = namedtuple("Prediction", ["author", "white_name", "black_name", "outcome", "round"])
-PredictionWithScore = namedtuple("PredictionWithScore", Prediction._fields + ("score", "guessed"))
 Ranking = namedtuple("Ranking", ["author", "ranking_list"])
-MastersAppellatives = namedtuple("MastersAppellatives", ["names", "nicknames"])
+MastersAppellatives = namedtuple("MastersAppellatives", ["names", "nicknames", "matcher"])
 TournamentData = namedtuple("TournamentData", [
     "last_checked_post_datetime",
     "post_corrections",
     "should_ignore_post",
+    "posts_string_blacklist",
+    "posts_author_blacklist",
     "official_ranking",
     "scoring_system",
+    "scoring_matrix",
     "enable_default_draw_prediction",
     "games_per_round",
     "team_names",
@@ -26,7 +41,8 @@ TournamentData = namedtuple("TournamentData", [
     "bonus_for_perfect_round_prediction",
     "negate_bonus_if_all_draws",
     "ranking_scoring",
-    "masters_scoring_bonuses"
+    "masters_scoring_bonuses",
+    "outcome_probabilities"
     ])
 RoundEntry = namedtuple("RoundEntry", [
     "round",
@@ -52,16 +68,20 @@ def load_aux_data(filename):
     with open(filename, "r", encoding = "utf-8") as file:
         data = json.load(file)
 
-        masters_appellatives = MastersAppellatives(
-            names = data["masters_names"],
-            nicknames = data["masters_nicknames"]
-            )
+        masters_names = data["masters_names"]
+        masters_nicknames = data["masters_nicknames"]
 
         # Add empty nicknames list, so that every master has an entry
         # in the nicknames dictionary
-        for master_name in masters_appellatives.names:
-            if master_name not in masters_appellatives.nicknames.keys():
-                masters_appellatives.nicknames[master_name] = []
+        for master_name in masters_names:
+            if master_name not in masters_nicknames.keys():
+                masters_nicknames[master_name] = []
+
+        masters_appellatives = MastersAppellatives(
+            names = masters_names,
+            nicknames = masters_nicknames,
+            matcher = compile_masters_matcher(masters_names, masters_nicknames)
+            )
 
         _, last_checked_post_datetime = get_username_and_date(
             data.get("last_checked_post", "Dubois\n10 ottobre 1817\n19:14\n"))
@@ -74,9 +94,11 @@ def load_aux_data(filename):
                 text = "\n".join(correction["text"]))
             post_corrections.append(post_correction)
 
-        def should_ignore_post(post):
-            return any(string in post.text for string in data["posts_string_blacklist"] if string != "") or (
-                    post.author in data["posts_author_blacklist"])
+        # A partial rather than a closure, so that it can be pickled
+        # and sent to the worker processes
+        should_ignore_post = functools.partial(is_post_blacklisted,
+            posts_string_blacklist = data["posts_string_blacklist"],
+            posts_author_blacklist = data["posts_author_blacklist"])
 
         if "Winner" in data["official_ranking"].keys():
             # Winner and Semifinalists
@@ -89,6 +111,10 @@ def load_aux_data(filename):
                 in data["official_ranking"].items() }
 
         scoring_system = data.get("scoring_system", "2_1_3")
+
+        scoring_systems = dict(builtin_scoring_systems, **data.get("scoring_systems", {}))
+        assert scoring_system in scoring_systems, "Unknown scoring system: " + scoring_system
+        scoring_matrix = compile_scoring_system(scoring_systems[scoring_system])
         
         enable_default_draw_prediction = data.get("enable_default_draw_prediction", False)
 
@@ -107,12 +133,26 @@ def load_aux_data(filename):
 
         masters_scoring_bonuses = data.get("masters_scoring_bonuses", {})
 
+        # Relative weights of the outcomes of the unplayed games, for --chances
+        outcome_probabilities = data.get("outcome_probabilities",
+            get_default_outcome_probabilities(scoring_systems[scoring_system]))
+        for outcome, weight in outcome_probabilities.items():
+            assert outcome in outcome_codes and outcome != "@", \
+                "Unknown outcome in outcome_probabilities: " + outcome
+            assert isinstance(weight, (int, float)) and weight >= 0, \
+                "Not a weight in outcome_probabilities: {} : {}".format(outcome, weight)
+        assert sum(outcome_probabilities.values()) > 0, \
+            "The weights in outcome_probabilities must not be all zero"
+
         tournament_data = TournamentData(
             last_checked_post_datetime = last_checked_post_datetime,
             post_corrections = post_corrections,
             should_ignore_post = should_ignore_post,
+            posts_string_blacklist = data["posts_string_blacklist"],
+            posts_author_blacklist = data["posts_author_blacklist"],
             official_ranking = official_ranking,
             scoring_system = scoring_system,
+            scoring_matrix = scoring_matrix,
             enable_default_draw_prediction = enable_default_draw_prediction,
             games_per_round = games_per_round,
             team_names = team_names,
@@ -120,44 +160,144 @@ def load_aux_data(filename):
             bonus_for_perfect_round_prediction = bonus_for_perfect_round_prediction,
             negate_bonus_if_all_draws = negate_bonus_if_all_draws,
             ranking_scoring = ranking_scoring,
-            masters_scoring_bonuses = masters_scoring_bonuses
+            masters_scoring_bonuses = masters_scoring_bonuses,
+            outcome_probabilities = outcome_probabilities
             )
 
         return masters_appellatives, tournament_data
     # S. also https://stackoverflow.com/questions/6578986/how-to-convert-json-data-into-a-python-object
 
-##############################################
-
-def load_posts(filename, should_ignore_post, team_names):
-    html_page = open(filename, "rb").read().decode("utf-8", "ignore")
-    soup = BeautifulSoup(html_page, "html.parser")
-    post_tags = soup.find_all("li", attrs={"class": re.compile("comment byuser.*")})
-
-    posts = []
+def is_post_blacklisted(post, posts_string_blacklist, posts_author_blacklist):
+    return any(string in post.text for string in posts_string_blacklist if string != "") or (
+            post.author in posts_author_blacklist)
 
-    for post_tag in post_tags:
-        comment_author_class = [
-            post_tag_class
-            for post_tag_class in post_tag["class"]
-            if post_tag_class.startswith("comment-author-") ]
-
-        if len(comment_author_class) != 1:
-            continue
-
-        post_text = post_tag.find("div", attrs = {"class": "info_com"}).text
-        post_username, post_date = get_username_and_date(post_text)
-        post_author = (
-            post_username if post_username not in team_names.keys()
-            else team_names[post_username])
-
-        post = Post( author = post_author, date = post_date, text = post_text )
+##############################################
 
-        if should_ignore_post(post):
-            continue
+class CommentsParser(html.parser.HTMLParser):
+    # Event-based extraction of the comments' "info_com" texts,
+    # without building the whole document tree
+
+    comment_class_re = re.compile("comment byuser.*")
+
+    def __init__(self):
+        super().__init__(convert_charrefs = True)
+        self.is_in_comment = False  # inside a comment <li>, before its "info_com" <div>
+        self.info_com_depth = 0  # count of open <div>s, from the "info_com" one
+        self.info_com_li_depth = 0  # count of open <li>s, inside the "info_com" <div>
+        self.info_com_chunks = []
+        self.pending_data = []  # text received since the last tag
+        self.ignored_tag_depth = 0  # inside <script> or <style>
+        self.info_com_texts = []  # completed texts, to be consumed by the caller
+
+    def flush_data(self):
+        # As BeautifulSoup does, turn every whitespace-only string
+        # between two tags into a single newline or space
+        if len(self.pending_data) == 0:
+            return
+
+        data = "".join(self.pending_data)
+        self.pending_data = []
+
+        if data.strip(" \t\n\r\f") == "":
+            data = "\n" if "\n" in data else " "
+        self.info_com_chunks.append(data)
+
+    def end_info_com(self):
+        self.info_com_texts.append("".join(self.info_com_chunks))
+        self.info_com_depth = 0
+        self.info_com_li_depth = 0
+        self.ignored_tag_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.flush_data()
+        tag_classes = (dict(attrs).get("class") or "").split()
+        is_comment_tag = (tag == "li" and self.comment_class_re.search(" ".join(tag_classes)))
+
+        # A <div> left open in a comment must not swallow the next comments
+        if tag == "li" and self.info_com_depth > 0:
+            if is_comment_tag:
+                self.end_info_com()
+            else:
+                self.info_com_li_depth += 1
+
+        if is_comment_tag:
+            comment_author_class = [
+                tag_class
+                for tag_class in tag_classes
+                if tag_class.startswith("comment-author-") ]
+            self.is_in_comment = (len(comment_author_class) == 1)
+        elif tag == "div" and self.info_com_depth > 0:
+            self.info_com_depth += 1
+        elif tag == "div" and self.is_in_comment and "info_com" in tag_classes:
+            self.is_in_comment = False
+            self.info_com_depth = 1
+            self.info_com_chunks = []
+        elif tag in ("script", "style") and self.info_com_depth > 0:
+            self.ignored_tag_depth += 1
+
+    def handle_endtag(self, tag):
+        self.flush_data()
+        if tag == "div" and self.info_com_depth > 0:
+            self.info_com_depth -= 1
+            if self.info_com_depth == 0:
+                self.end_info_com()
+        elif tag == "li" and self.info_com_depth > 0:
+            # The end of the comment closes its open <div>s, as in BeautifulSoup
+            if self.info_com_li_depth > 0:
+                self.info_com_li_depth -= 1
+            else:
+                self.end_info_com()
+        elif tag in ("script", "style") and self.ignored_tag_depth > 0:
+            self.ignored_tag_depth -= 1
+
+    def handle_data(self, data):
+        if self.info_com_depth > 0 and self.ignored_tag_depth == 0:
+            self.pending_data.append(data)
+
+    def handle_comment(self, data):
+        self.flush_data()
+
+    def close(self):
+        super().close()
+        self.flush_data()
+        # Not even the end of its comment: likely a truncated download
+        if self.info_com_depth > 0:
+            write_err("Unterminated post at the end of the thread, ignored:\n{}\n\n".format(
+                repr("".join(self.info_com_chunks))))
+            self.info_com_depth = 0
+
+def stream_posts(filename, should_ignore_post, team_names, chunk_size = 64 * 1024):
+    decoder = codecs.getincrementaldecoder("utf-8")("ignore")
+    comments_parser = CommentsParser()
+
+    def completed_posts():
+        for post_text in comments_parser.info_com_texts:
+            post_username, post_date = get_username_and_date(post_text)
+            post_author = (
+                post_username if post_username not in team_names.keys()
+                else team_names[post_username])
+
+            post = Post( author = post_author, date = post_date, text = post_text )
+
+            if not should_ignore_post(post):
+                yield post
+
+        comments_parser.info_com_texts = []
+
+    with open(filename, "rb") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if chunk == b"":
+                break
+            comments_parser.feed(decoder.decode(chunk))
+            yield from completed_posts()
 
-        posts.append(post)
+    comments_parser.feed(decoder.decode(b"", final = True))
+    comments_parser.close()
+    yield from completed_posts()
 
-    return posts
+def load_posts(filename, should_ignore_post, team_names):
+    return list(stream_posts(filename, should_ignore_post, team_names))
 
 ##############################################
 
@@ -200,14 +340,27 @@ get_username_and_date.months = {
 
 ##############################################
 
-def get_line_round(line):
+def get_line_round(line_tokens):
+    line = line_tokens.folded_line
+
+    # Only lines mentioning a round can give its number
+    if "round" not in line and "turno" not in line:
+        return None
+
     # replace turn numbers expressed in non-standard forms ("primo", "VI", etc.)
-    # with Arabic numbers
-    for ordinal, replacement in get_line_round.ordinal_replacements_regexps:
-        (new_line, replacement_count) = ordinal.subn(replacement, line)
-        if replacement_count > 0:
-            line = new_line
-            break
+    # with Arabic numbers.
+    # If the line has several of them, only the one first in
+    # `ordinal_replacements` is used
+    ordinals_in_line = [
+        get_line_round.ordinals[word_match.group()]
+        for word_match in get_line_round.ordinal_candidate_re.finditer(line)
+        if word_match.group() in get_line_round.ordinals ]
+
+    if len(ordinals_in_line) > 0:
+        _, ordinal, replacement = min(ordinals_in_line)
+        line = get_line_round.ordinal_candidate_re.sub(
+            lambda word_match: replacement if word_match.group() == ordinal else word_match.group(),
+            line)
 
     # Indentify and extract the turn number
     for round_regexp in get_line_round.round_regexps:
@@ -220,65 +373,127 @@ def get_line_round(line):
 
     return None
 
-get_line_round.ordinal_replacements = [
-    (r"(^|\W)primo(:|$|\W)", " 1 "),
-    (r"(^|\W)secondo(:|$|\W)", " 2 "),
-    (r"(^|\W)terzo(:|$|\W)", " 3 "),
-    (r"(^|\W)quarto(:|$|\W)", " 4 "),
-    (r"(^|\W)quinto(:|$|\W)", " 5 "),
-    (r"(^|\W)sesto(:|$|\W)", " 6 "),
-    (r"(^|\W)settimo(:|$|\W)", " 7 "),
-    (r"(^|\W)ottavo(:|$|\W)", " 8 "),
-    (r"(^|\W)nono(:|$|\W)", " 9 "),
-    (r"(^|\W)decimo(:|$|\W)", " 10 "),
-    (r"(^|\W)undicesimo(:|$|\W)", " 11 "),
-    (r"(^|\W)dodicesimo(:|$|\W)", " 12 "),
-    (r"(^|\W)tredicesimo(:|$|\W)", " 13 "),
-    (r"(^|\W)quattordicesimo(:|$|\W)", " 14 "),
-    (r"(^|\W)quindicesimo(:|$|\W)", " 15 "),
-    (r"(^|\W)sedicesimo(:|$|\W)", " 16 "),
-    (r"(^|\W)I(:|$|\W)", " 1 "),
-    (r"(^|\W)II(:|$|\W)", " 2 "),
-    (r"(^|\W)III(:|$|\W)", " 3 "),
-    (r"(^|\W)IV(:|$|\W)", " 4 "),
-    (r"(^|\W)V(:|$|\W)", " 5 "),
-    (r"(^|\W)VI(:|$|\W)", " 6 "),
-    (r"(^|\W)VII(:|$|\W)", " 7 "),
-    (r"(^|\W)VIII(:|$|\W)", " 8 "),
-    (r"(^|\W)IX(:|$|\W)", " 9 "),
-    (r"(^|\W)X(:|$|\W)", " 10 "),
-    (r"(^|\W)XI(:|$|\W)", " 11 "),
-    (r"(^|\W)XII(:|$|\W)", " 12 "),
-    (r"(^|\W)XIII(:|$|\W)", " 13 "),
-    (r"(^|\W)XIV(:|$|\W)", " 14 "),
-    (r"(^|\W)XV(:|$|\W)", " 15 "),
-    (r"(^|\W)XVI(:|$|\W)", " 16 "),
+def get_roman_numeral(number):
+    roman_numeral = ""
+    for value, symbols in [(1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"),
+            (90, "XC"), (50, "L"), (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")]:
+        while number >= value:
+            roman_numeral += symbols
+            number -= value
+    return roman_numeral
+
+get_line_round.italian_ordinals = [
+    "primo", "secondo", "terzo", "quarto", "quinto",
+    "sesto", "settimo", "ottavo", "nono", "decimo",
+    "undicesimo", "dodicesimo", "tredicesimo", "quattordicesimo", "quindicesimo",
+    "sedicesimo", "diciassettesimo", "diciottesimo", "diciannovesimo", "ventesimo",
+    "ventunesimo", "ventiduesimo", "ventitreesimo", "ventiquattresimo", "venticinquesimo",
+    "ventiseiesimo", "ventisettesimo", "ventottesimo", "ventinovesimo", "trentesimo",
     ]
 
-get_line_round.ordinal_replacements_regexps = [
-    ( re.compile(pair[0], re.IGNORECASE | re.ASCII), pair[1]) for pair in get_line_round.ordinal_replacements
-]
+# In order of priority
+get_line_round.ordinal_replacements = (
+    [ (ordinal, " {} ".format(number))
+        for number, ordinal in enumerate(get_line_round.italian_ordinals, start = 1) ]
+    + [ (get_roman_numeral(number), " {} ".format(number))
+        for number in range(1, len(get_line_round.italian_ordinals) + 1) ]
+    )
+
+# lowercase ordinal --> (priority, lowercase ordinal, replacement)
+get_line_round.ordinals = {
+    ordinal.lower() : (priority, ordinal.lower(), replacement)
+    for priority, (ordinal, replacement) in enumerate(get_line_round.ordinal_replacements) }
+
+# Any standalone word, to be looked up in the ordinals table
+get_line_round.ordinal_candidate_re = re.compile(r"(?<!\w)[a-z]+(?!\w)", re.ASCII)
 
 get_line_round.round_regexps = [
-    re.compile(r"(Round|Turno)\W*(?P<round_number>\d+)", re.IGNORECASE | re.ASCII),
-    re.compile(r"(?P<round_number>\d+)\W*(Round|Turno)", re.IGNORECASE | re.ASCII)
+    re.compile(r"(round|turno)\W*(?P<round_number>\d+)", re.ASCII),
+    re.compile(r"(?P<round_number>\d+)\W*(round|turno)", re.ASCII)
 ]
 
 def get_masters_names_in_line(line, masters_appellatives):
-    masters_names_in_line = []
-    for master_name in masters_appellatives.names:
+    # For every master, the position of the first of its tokens
+    # (family name, first name, nicknames, in this order of priority)
+    # found in the line, as (token_index, position).
+    # The line must be folded, see fold_line
+    masters_hits = {}
+
+    masters_matcher = masters_appellatives.matcher
+    for match in masters_matcher.regex.finditer(line):
+        for group_index, (master_index, token_index) in masters_matcher.group_tokens.items():
+            if match.start(group_index) >= 0:
+                hit = (token_index, match.start())
+                masters_hits[master_index] = min(hit, masters_hits.get(master_index, hit))
+
+    return [
+        (masters_appellatives.names[master_index], masters_hits[master_index][1])
+        for master_index in sorted(masters_hits.keys()) ]
+
+MastersMatcher = namedtuple("MastersMatcher", ["regex", "group_tokens"])
+
+def compile_masters_matcher(names, nicknames):
+    # Build a single regex finding, in one pass over the line,
+    # every position where a master's token starts.
+    # At each position, a lookahead per master captures
+    # the highest-priority token of that master matching there
+    # (groups are tried left to right).
+    # The first lookahead is just a cheap filter for the positions
+    # where at least a token matches.
+    token_boundary = r"(?:\b|\d|½)"
+
+    all_tokens_patterns = []
+    masters_patterns = []
+    group_tokens = {}  # regex group index --> (master_index, token_index)
+    for master_index, master_name in enumerate(names):
         # Try to match just the first or family name, or the nick
         master_tokens = master_name.split()
-        master_tokens.extend(masters_appellatives.nicknames[master_name])
-
-        for master_token in master_tokens:
-            token_regex = r"(\b|\d|½)" + master_token + r"(\b|\d|½)"
-            maybe_match = re.search(token_regex, line, re.IGNORECASE)
-            if maybe_match is not None:
-                masters_names_in_line.append((master_name, maybe_match.start()))
-                break
+        master_tokens.extend(nicknames[master_name])
+
+        tokens_patterns = []
+        for token_index, master_token in enumerate(master_tokens):
+            # Matched against folded lines
+            master_token = fold_line(master_token)
+            group_tokens[len(group_tokens) + 1] = (master_index, token_index)
+            tokens_patterns.append(
+                "(" + token_boundary + master_token + token_boundary + ")")
+            all_tokens_patterns.append(master_token)
+
+        masters_patterns.append("(?:(?=" + "|".join(tokens_patterns) + "))?")
+
+    all_tokens_pattern = "(?=" + token_boundary + "(?:" + "|".join(all_tokens_patterns) + "))"
+
+    return MastersMatcher(
+        regex = re.compile(all_tokens_pattern + "".join(masters_patterns)),
+        group_tokens = group_tokens)
+
+def fold_line(line):
+    # Lower case, and a single spelling of the characters
+    # with variants: all dashes become "-",
+    # the Cyrillic "х" (typed for a draw) becomes "x"
+    return line.lower().translate(fold_line.translation)
+
+fold_line.translation = str.maketrans({
+    "–" : "-",
+    "—" : "-",
+    "х" : "x",
+    })
+
+LineTokens = namedtuple("LineTokens", [
+    "folded_line",
+    "masters_names"])  # masters mentioned in the line, in order of position
+
+def tokenize_line(line, masters_appellatives):
+    # Done once per line, for all of get_line_round,
+    # get_line_prediction and get_line_ranking
+    folded_line = fold_line(line)
+
+    masters_names_in_line = get_masters_names_in_line(folded_line, masters_appellatives)
+    masters_names_in_line.sort(key = itemgetter(1))
 
-    return masters_names_in_line
+    return LineTokens(
+        folded_line = folded_line,
+        masters_names = [ master_name for master_name, _ in masters_names_in_line ])
 
 class ParseOutcome(Enum):
     SUCCESS = 1,
@@ -292,29 +507,27 @@ LinePredictionResult = namedtuple("LinePredictionResult", [
     "second_master",
     "match_outcome"])
 
-def get_line_prediction(line, masters_appellatives, author_name):
-    # Find result
-    match_outcome = None
-    for outcome_re, outcome in get_line_prediction.possible_outcomes:
-        if outcome_re.search(line):
-            match_outcome = outcome
-            break
-
-    masters_names_in_line = get_masters_names_in_line(line, masters_appellatives)
+def get_line_prediction(line_tokens, author_name):
+    masters_names_in_line = line_tokens.masters_names
 
-    masters_names_in_line.sort(key = itemgetter(1))
+    # Find result, only needed if the line can be a game
+    match_outcome = None
+    if len(masters_names_in_line) >= 2:
+        outcome_match = get_line_prediction.outcomes_re.match(line_tokens.folded_line)
+        if outcome_match:
+            match_outcome = get_line_prediction.outcomes_by_group[outcome_match.lastgroup]
 
     if len(masters_names_in_line) == 2 and match_outcome is not None:
         return LinePredictionResult(
             parse_outcome = ParseOutcome.SUCCESS,
             suspect_reason = None,
-            first_master = masters_names_in_line[0][0],
-            second_master = masters_names_in_line[1][0],
+            first_master = masters_names_in_line[0],
+            second_master = masters_names_in_line[1],
             match_outcome = match_outcome)
     elif len(masters_names_in_line) == 1:
         return LinePredictionResult(
             parse_outcome = ParseOutcome.SUSPECT,
-            suspect_reason = "One master, {}".format(masters_names_in_line[0][0]),
+            suspect_reason = "One master, {}".format(masters_names_in_line[0]),
             first_master = None,
             second_master = None,
             match_outcome = None)
@@ -332,59 +545,71 @@ def get_line_prediction(line, masters_appellatives, author_name):
         return LinePredictionResult(
             parse_outcome = ParseOutcome.SUCCESS,
             suspect_reason = None,
-            first_master = masters_names_in_line[0][0],
-            second_master = masters_names_in_line[1][0],
+            first_master = masters_names_in_line[0],
+            second_master = masters_names_in_line[1],
             match_outcome = "@")
     else:
         return LinePredictionResult(
             parse_outcome = ParseOutcome.SUSPECT,
-            suspect_reason = "{} masters: {}".format(len(masters_names_in_line), (", ").join([master_name[0] for master_name in masters_names_in_line])),
+            suspect_reason = "{} masters: {}".format(len(masters_names_in_line), (", ").join(masters_names_in_line)),
             first_master = None,
             second_master = None,
             match_outcome = match_outcome)
 
 # In descending order of reliability,
 # e.g. "0 - 1" matches both the 2nd and the 6th regexp,
-# but the former has priority
+# but the former has priority.
+# The lines are folded (see fold_line): lower case, and "-" for all dashes
 get_line_prediction.possible_outcomes = [
-        (re.compile(r"\D1\s*[-–\\\/]\s*0($|\D)"), "1"), # 1 - 0
-        (re.compile(r"\D0\s*[-–\\\/]\s*1($|\D)"), "2"), # 0 - 1
-        (re.compile(r"\D½\s*[-–\\\/]\s*½($|\D)"), "X"), # ½ - ½
+        (re.compile(r"\D1\s*[-\\\/]\s*0($|\D)"), "1"), # 1 - 0
+        (re.compile(r"\D0\s*[-\\\/]\s*1($|\D)"), "2"), # 0 - 1
+        (re.compile(r"\D½\s*[-\\\/]\s*½($|\D)"), "X"), # ½ - ½
         (re.compile(r"\D1\s*[\\\/]\s*2($|\D)"), "X"), # 1/2
         (re.compile(r"\D0\.5($|\D)"), "X"), # 0.5
         (re.compile(r"\D0\,5($|\D)"), "X"), # 0,5
-        (re.compile(r"\s[Pp]atta($|\s)"), "X"), # patta
+        (re.compile(r"\spatta($|\s)"), "X"), # patta
         (re.compile(r"\s½($|\s)"), "X"), # patta
         (re.compile(r"\s1\s*0($|\s)"), "1"), # 1 0
         (re.compile(r"\s0\s*1($|\s)"), "2"), # 0 1
-        (re.compile(r"\s[хxX]($|\s)"), "X"), # X (la prima è una "ha" cirillica!
+        (re.compile(r"\sx($|\s)"), "X"), # X, or a Cyrillic "ha"
         (re.compile(r"\D1\s*$"), "1"), # 1 (end of line)
         (re.compile(r"\D2\s*$"), "2"), # 2 (end of line)
-        (re.compile(r"\D1R($|\s)"), "1R"), # 1R (special for rapid+armageddon format)
-        (re.compile(r"\D2R($|\s)"), "2R"), # 2R (special for rapid+armageddon format)
-        (re.compile(r"\D1A($|\s)"), "1A"), # 1A (special for rapid+armageddon format)
-        (re.compile(r"\D2A($|\s)"), "2A"), # 2A (special for rapid+armageddon format)
+        (re.compile(r"\D1r($|\s)"), "1R"), # 1R (special for rapid+armageddon format)
+        (re.compile(r"\D2r($|\s)"), "2R"), # 2R (special for rapid+armageddon format)
+        (re.compile(r"\D1a($|\s)"), "1A"), # 1A (special for rapid+armageddon format)
+        (re.compile(r"\D2a($|\s)"), "2A"), # 2A (special for rapid+armageddon format)
         (re.compile(r"\D1($|[^0-9.])"), "1"), # 1
         (re.compile(r"\D2($|[^0-9.])"), "2"), # 2
-        (re.compile(r"X\s*$"), "X"), # X (end of line)
+        (re.compile(r"x\s*$"), "X"), # X (end of line)
         (re.compile(r"@@@"), "@") # @ (still to be played)
         ]
 
-def get_line_ranking(line, masters_appellatives, author_name):
-    masters_names_in_line = []
+# All the above in a single regex: every alternative looks ahead
+# over the whole line, so the first one matching anywhere wins,
+# as if the regexps were tried one by one in the given order
+get_line_prediction.outcomes_re = re.compile(
+    "^(?:" + "|".join(
+        r"(?=.*?(?:{}))(?P<outcome_{}>)".format(outcome_re.pattern, index)
+        for index, (outcome_re, _) in enumerate(get_line_prediction.possible_outcomes))
+    + ")", re.DOTALL)
+
+get_line_prediction.outcomes_by_group = {
+    "outcome_{}".format(index) : outcome
+    for index, (_, outcome) in enumerate(get_line_prediction.possible_outcomes) }
 
-    masters_names_in_line = get_masters_names_in_line(line, masters_appellatives)
+def get_line_ranking(line_tokens):
+    masters_names_in_line = line_tokens.masters_names
 
     if len(masters_names_in_line) != 1:
         return None
 
     # Check that no other words are on the line
     # except possibly for a number
-    if not get_line_ranking.line_re.search(line):
+    if not get_line_ranking.line_re.search(line_tokens.folded_line):
         return None
 
     # Success
-    return masters_names_in_line[0][0]
+    return masters_names_in_line[0]
 
 
 # One optional numer at the beginning,
@@ -393,44 +618,19 @@ get_line_ranking.line_re = re.compile(r"^\s*\d*[).ªº\W]*(\S+\s?){1,3}(\s)*$")
 
 ##############################################
 
-def get_winner(prediction):
-    if prediction.outcome == "X":
-        return None
-    elif prediction.outcome == "1":
-        return prediction.white_name
-    elif prediction.outcome == "2":
-        return prediction.black_name
-    elif prediction.outcome == "1R":
-        return prediction.white_name
-    elif prediction.outcome == "2R":
-        return prediction.black_name
-    elif prediction.outcome == "1A":
-        return prediction.white_name
-    elif prediction.outcome == "2A":
-        return prediction.black_name
-
-        raise AssertionError("Outcome {} is not valid".format(prediction.outcome))
-
-    
-def get_loser(prediction):
-    if prediction.outcome == "X":
-        return None
-    elif prediction.outcome == "1":
-        return prediction.black_name
-    elif prediction.outcome == "2":
-        return prediction.white_name
-    elif prediction.outcome == "1R":
-        return prediction.black_name
-    elif prediction.outcome == "2R":
-        return prediction.white_name
-    elif prediction.outcome == "1A":
-        return prediction.black_name
-    elif prediction.outcome == "2A":
-        return prediction.white_name
-    
-        raise AssertionError("Outcome {} is not valid".format(prediction.outcome))
-
 def extract_predictions(post, masters_appellatives, tournament_data):
+    post_predictions, post_ranking, suspect_reasons = parse_post(
+        post, masters_appellatives, tournament_data)
+
+    report_suspect_post(post, suspect_reasons, tournament_data)
+
+    return post_predictions, post_ranking
+
+def report_suspect_post(post, suspect_reasons, tournament_data):
+    if suspect_reasons != "" and post.date > tournament_data.last_checked_post_datetime :
+        write_err("Suspect post:\n{}\nReasons:\n{}\n\n".format(repr(post.text), suspect_reasons))
+
+def parse_post(post, masters_appellatives, tournament_data):
     games_per_round = tournament_data.games_per_round
 
     lines = post.text.split("\n")
@@ -441,14 +641,15 @@ def extract_predictions(post, masters_appellatives, tournament_data):
     post_current_round = None
     is_in_ranking_mode = False
 
-    is_post_suspect = False
     suspect_reasons = ""
     for line in lines:
-        line_round = get_line_round(line)
+        line_tokens = tokenize_line(line, masters_appellatives)
+
+        line_round = get_line_round(line_tokens)
         if line_round is not None:
             post_current_round = line_round
 
-        line_prediction = get_line_prediction(line, masters_appellatives, post.author)
+        line_prediction = get_line_prediction(line_tokens, post.author)
 
         if line_prediction.parse_outcome == ParseOutcome.SUCCESS:
             prediction = Prediction(
@@ -461,13 +662,12 @@ def extract_predictions(post, masters_appellatives, tournament_data):
             post_predictions.append(prediction)
             continue
         else:
-            line_ranking = get_line_ranking(line, masters_appellatives, post.author)
+            line_ranking = get_line_ranking(line_tokens)
             if line_ranking is not None:
                 partial_ranking.append(line_ranking)
             elif line_prediction.parse_outcome == ParseOutcome.SUSPECT:
                 suspect_reasons += "Suspect line: {} ({})\n".format(
                     line, line_prediction.suspect_reason)
-                is_post_suspect = True
 
     if games_per_round == None:
         games_per_round_count = len(masters_appellatives.names) / 2
@@ -477,7 +677,6 @@ def extract_predictions(post, masters_appellatives, tournament_data):
     if len(post_predictions) % games_per_round_count != 0:
         suspect_reasons += "Unusual number of predictions: {}\n".format(
             len(post_predictions))
-        is_post_suspect = True
 
     if len(partial_ranking) == tournament_data.expected_ranking_length:
         post_ranking = Ranking(
@@ -486,246 +685,679 @@ def extract_predictions(post, masters_appellatives, tournament_data):
     else:
         if len(partial_ranking) != 0:
             suspect_reasons += "Bad ranking: {}\n".format(partial_ranking)
-            is_post_suspect = True
         post_ranking = None
 
     if len(post_predictions) == 0 and post_ranking is None:
         suspect_reasons += "No predictions nor ranking\n"
-        is_post_suspect = True
 
-    if is_post_suspect and post.date > tournament_data.last_checked_post_datetime :
-        write_err("Suspect post:\n{}\nReasons:\n{}\n\n".format(repr(post.text), suspect_reasons))
+    return post_predictions, post_ranking, suspect_reasons
 
-    return post_predictions, post_ranking
+def parse_posts(posts, masters_appellatives, tournament_data, jobs = 1):
+    # Same as calling `parse_post` on every post, possibly spread
+    # over `jobs` processes; the results are in the order of `posts`
+    if jobs <= 1 or len(posts) < 2:
+        return [
+            parse_post(post, masters_appellatives, tournament_data)
+            for post in posts ]
 
-##############################################
+    # A few chunks per process, to balance the load
+    # without paying the transfer cost for every single post
+    chunk_size = math.ceil(len(posts) / (jobs * 4))
+    posts_chunks = [
+        posts[chunk_start : chunk_start + chunk_size]
+        for chunk_start in range(0, len(posts), chunk_size) ]
 
-def repair_turns(predictions):
-    def game(prediction):
-        return (
-            prediction.white_name,
-            prediction.black_name,
-            )
+    with concurrent.futures.ProcessPoolExecutor(max_workers = jobs) as executor:
+        chunks_results = executor.map(parse_posts, posts_chunks,
+            itertools.repeat(masters_appellatives), itertools.repeat(tournament_data))
 
-    official_results = {
-        game(official_result) : official_result
-        for official_result in predictions
-        if official_result.author == "Official results"
+        return [
+            post_result
+            for chunk_results in chunks_results
+            for post_result in chunk_results ]
+
+##############################################
+# incremental state
+
+# Results of the thread posts already parsed in a previous run,
+# so that only the posts newer than the checkpoint need to be parsed again.
+# Official results and corrections are always parsed, as they are cheap
+# and change independently from the thread.
+ParseState = namedtuple("ParseState", [
+    "fingerprint",
+    "checkpoint_datetime",
+    "parsed_posts",
+    "frozen_rounds"])  # round --> FrozenRound
+
+def get_post_key(post):
+    post_id = "{}\n{}\n{}".format(post.author, post.date.isoformat(), post.text)
+    return hashlib.sha1(post_id.encode("utf-8")).hexdigest()
+
+# To be increased whenever `parse_post` can give different results
+# for the same post, or the posts are extracted differently from the
+# same thread, so that the saved results are discarded
+PARSER_VERSION = 3
+
+def get_parse_fingerprint(masters_appellatives, tournament_data):
+    # Everything (besides the post itself) that influences `parse_post`
+    parse_inputs = [
+        PARSER_VERSION,
+        masters_appellatives.names,
+        masters_appellatives.nicknames,
+        tournament_data.games_per_round,
+        tournament_data.expected_ranking_length,
+        ]
+    parse_inputs_text = json.dumps(parse_inputs, sort_keys = True, ensure_ascii = False)
+    return hashlib.sha1(parse_inputs_text.encode("utf-8")).hexdigest()
+
+def post_result_to_json(post_result):
+    post_predictions, post_ranking, suspect_reasons = post_result
+    return {
+        "predictions" : post_predictions,
+        "ranking" : post_ranking,
+        "suspect_reasons" : suspect_reasons }
+
+def post_result_from_json(entry):
+    return (
+        [ Prediction(*prediction) for prediction in entry["predictions"] ],
+        Ranking(*entry["ranking"]) if entry["ranking"] is not None else None,
+        entry["suspect_reasons"])
+
+def write_json_atomically(filename, data):
+    # Write to a temporary file first, so that an interrupted run
+    # cannot leave a truncated file behind
+    temporary_filename = filename + ".tmp"
+    with open(temporary_filename, "w", encoding = "utf-8") as file:
+        json.dump(data, file, ensure_ascii = False)
+    os.replace(temporary_filename, filename)
+
+def load_parse_state(filename, fingerprint):
+    empty_state = ParseState(
+        fingerprint = fingerprint,
+        checkpoint_datetime = None,
+        parsed_posts = {},
+        frozen_rounds = {})
+
+    try:
+        with open(filename, "r", encoding = "utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return empty_state
+
+    if data.get("fingerprint") != fingerprint:
+        write_err("Parsing configuration changed, discarding {}\n".format(filename))
+        return empty_state
+
+    parsed_posts = {
+        post_key : post_result_from_json(entry)
+        for post_key, entry in data["parsed_posts"].items() }
+
+    # The frozen rounds are only an optimisation: if saved
+    # in an older format, they are all calculated again
+    try:
+        frozen_rounds = {
+            int(round) : frozen_round_from_json(entry)
+            for round, entry in data.get("frozen_rounds", {}).items() }
+    except (ValueError, TypeError, AttributeError):
+        frozen_rounds = {}
+
+    return ParseState(
+        fingerprint = fingerprint,
+        checkpoint_datetime = datetime.datetime.fromisoformat(data["checkpoint"]),
+        parsed_posts = parsed_posts,
+        frozen_rounds = frozen_rounds)
+
+def save_parse_state(filename, parse_state):
+    data = {
+        "fingerprint" : parse_state.fingerprint,
+        "checkpoint" : parse_state.checkpoint_datetime.isoformat(),
+        "parsed_posts" : {
+            post_key : post_result_to_json(post_result)
+            for post_key, post_result in parse_state.parsed_posts.items() },
+        "frozen_rounds" : {
+            round : frozen_round_to_json(frozen_round)
+            for round, frozen_round in parse_state.frozen_rounds.items() }
         }
 
-    def repaired_prediction(prediction):
-        if game(prediction) not in official_results:
-            write_err("Missing game in official results: " + str(prediction) + "\n")
-            return prediction
+    write_json_atomically(filename, data)
 
-        expected_round = official_results[game(prediction)].round
-        assert expected_round is not None, "Missing round in official results for game" + str(prediction)
+def parse_posts_incrementally(posts, masters_appellatives, tournament_data, parse_state, jobs = 1):
+    # Returns the results of every post, in the order of `posts`,
+    # together with the updated state
+    checkpoint_datetime = parse_state.checkpoint_datetime
 
-        # if the given round matches with the tournament calendar, do nothing
-        if prediction.round == expected_round:
-            return prediction
+    posts_keys = [ get_post_key(post) for post in posts ]
 
-        # Otherwise, write the correct round number
-        # Only give a warning if a wrong round was given
-        # (not if it was missing)
-                # (disabled, as not useful)
-        #if prediction.round is not None:
-        #    write_err("%s: wrong round, should be %d\n\n" % (prediction, expected_round))
+    new_posts = [
+        post
+        for post, post_key in zip(posts, posts_keys)
+        if checkpoint_datetime is None
+            or post.date > checkpoint_datetime
+            or post_key not in parse_state.parsed_posts ]
 
-        prediction_dict = prediction._asdict()  # make the prediction mutable
-        prediction_dict["round"] = expected_round
-        return Prediction(**prediction_dict)
+    new_posts_results = iter(parse_posts(new_posts, masters_appellatives, tournament_data, jobs))
 
-    return list(map(repaired_prediction, predictions))
+    parsed_posts = {}
+    posts_results = []
+    for post, post_key in zip(posts, posts_keys):
+        if (checkpoint_datetime is not None
+                and post.date <= checkpoint_datetime
+                and post_key in parse_state.parsed_posts):
+            post_result = parse_state.parsed_posts[post_key]
+        else:
+            post_result = next(new_posts_results)
 
-def remove_duplicates(predictions):
-    # from https://stackoverflow.com/a/480227/2453661
+        # Posts which disappeared from the thread are dropped from the state
+        parsed_posts[post_key] = post_result
+        posts_results.append(post_result)
 
-    # Iterate the list of predictions in reverse chronological order,
-    # store every seen one in a set,
-    # and discard a prediction
-    # if another with the same author and game was already seen
+    write_err("Parsed {} new posts out of {}\n".format(len(new_posts), len(posts)))
 
-    seen = {}
+    new_checkpoint_datetime = max(
+        [post.date for post in posts] + ([checkpoint_datetime] if checkpoint_datetime else []),
+        default = datetime.datetime(1817, 10, 10))
 
-    def is_obsolete(prediction, seen):
-        prediction_key = (
-            prediction.author,
-            prediction.white_name,
-            prediction.black_name,
-            prediction.round
-            )
+    new_parse_state = ParseState(
+        fingerprint = parse_state.fingerprint,
+        checkpoint_datetime = new_checkpoint_datetime,
+        parsed_posts = parsed_posts,
+        frozen_rounds = parse_state.frozen_rounds)
 
-        if prediction_key in seen.keys():
-            return True
-        else:
-            seen[prediction_key] = prediction
-            return False
+    return posts_results, new_parse_state
 
-    return list(reversed([
-        prediction for prediction in reversed(predictions)
-        #prediction for prediction in predictions
-        if not is_obsolete(prediction, seen)
-        ]))
+##############################################
+# posts memo
+
+# Parse results of single posts, which never change once posted.
+# Unlike the incremental state, the memo does not depend on a checkpoint.
+# It only keeps the posts of the last run, for its parsing configuration
+# (the memo keys include the fingerprint): after a configuration change
+# all the posts are parsed again
+
+def get_post_memo_key(post, parse_fingerprint):
+    return hashlib.sha1((get_post_key(post) + parse_fingerprint).encode("utf-8")).hexdigest()
+
+def load_posts_memo(filename):
+    # memo key --> post result
+    try:
+        with open(filename, "r", encoding = "utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+    return {
+        memo_key : post_result_from_json(entry)
+        for memo_key, entry in data.items() }
+
+def save_posts_memo(filename, posts_memo):
+    write_json_atomically(filename, {
+        memo_key : post_result_to_json(post_result)
+        for memo_key, post_result in posts_memo.items() })
+
+def parse_posts_memoized(posts, masters_appellatives, tournament_data, posts_memo, jobs = 1):
+    # Returns the results of every post, in the order of `posts`,
+    # together with the memo of the posts seen in this run
+    parse_fingerprint = get_parse_fingerprint(masters_appellatives, tournament_data)
+    memo_keys = [ get_post_memo_key(post, parse_fingerprint) for post in posts ]
+
+    # A post repeated in the thread (same author, date and text) is parsed
+    # once: the results are consumed once per new memo key, below
+    new_posts_by_memo_key = {}
+    for post, memo_key in zip(posts, memo_keys):
+        if memo_key not in posts_memo and memo_key not in new_posts_by_memo_key:
+            new_posts_by_memo_key[memo_key] = post
+    new_posts = list(new_posts_by_memo_key.values())
+
+    new_posts_results = iter(parse_posts(new_posts, masters_appellatives, tournament_data, jobs))
+
+    # Posts which disappeared from the thread are dropped from the memo
+    new_posts_memo = {}
+    for memo_key in memo_keys:
+        if memo_key not in new_posts_memo:
+            new_posts_memo[memo_key] = (
+                posts_memo[memo_key] if memo_key in posts_memo
+                else next(new_posts_results))
+
+    write_err("Parsed {} new posts out of {}\n".format(len(new_posts), len(posts)))
+
+    posts_results = [ new_posts_memo[memo_key] for memo_key in memo_keys ]
+    return posts_results, new_posts_memo
 
+##############################################
+# thread cache
+
+# Posts and parse results of the last few versions of the thread,
+# so that runs on an unchanged thread (e.g. after editing just the
+# scoring or the corrections) skip parsing altogether
+
+def get_thread_cache_key(thread_filename, masters_appellatives, tournament_data):
+    # Everything which determines the posts and their parse results
+    posts_selection = [
+        tournament_data.team_names,
+        tournament_data.posts_string_blacklist,
+        tournament_data.posts_author_blacklist,
+        ]
+    posts_selection_text = json.dumps(posts_selection, sort_keys = True, ensure_ascii = False)
+
+    cache_key = hashlib.sha1()
+    with open(thread_filename, "rb") as file:
+        cache_key.update(file.read())
+    cache_key.update(get_parse_fingerprint(masters_appellatives, tournament_data).encode("utf-8"))
+    cache_key.update(posts_selection_text.encode("utf-8"))
+    return cache_key.hexdigest()
+
+def load_thread_cache(cache_directory, cache_key):
+    # Returns the cached (posts, posts_results), or None
+    cache_filename = os.path.join(cache_directory, cache_key + ".json")
+    try:
+        with open(cache_filename, "r", encoding = "utf-8") as file:
+            data = json.load(file)
+    except (OSError, ValueError):
+        return None
 
-def assign_prediction_scores(predictions, scoring_system, masters_scoring_bonuses):
-    def prediction_key(prediction):
-        return (
-            prediction.white_name,
-            prediction.black_name,
-            prediction.outcome
-            )
+    # Mark as recently used, for the eviction
+    os.utime(cache_filename)
 
-    official_results = {
-        prediction_key(official_result) : official_result
-        for official_result in predictions
-        if official_result.author == "Official results"
-        }
+    posts = [
+        Post(author = author, date = datetime.datetime.fromisoformat(date), text = text)
+        for author, date, text in data["posts"] ]
+    posts_results = [ post_result_from_json(entry) for entry in data["posts_results"] ]
 
-    scored_predictions = []
-    for prediction in predictions:
-        score = 0
-        guessed = False
-        if prediction_key(prediction) in official_results.keys():
-            guessed = True
-            if tournament_data.scoring_system == "2_2_2":
-                if prediction.outcome == "1":
-                    score = 2
-                elif prediction.outcome == "X":
-                    score = 2
-                elif prediction.outcome == "2":
-                    score = 2
-            elif scoring_system == "2_1_3":
-                if prediction.outcome == "1":
-                    score = 2
-                elif prediction.outcome == "X":
-                    score = 1
-                elif prediction.outcome == "2":
-                    score = 3
-            elif scoring_system == "3_1_4":
-                if prediction.outcome == "1":
-                    score = 3
-                elif prediction.outcome == "X":
-                    score = 1
-                elif prediction.outcome == "2":
-                    score = 4
-            else:
-                assert False, "Unknown scoring system: " + scoring_system
+    return posts, posts_results
 
-            INDEX_BONUS_FOR_WINNER = 0
-            INDEX_BONUS_FOR_LOSER = 1
+def save_thread_cache(cache_directory, cache_key, posts, posts_results, max_entries):
+    os.makedirs(cache_directory, exist_ok = True)
 
-            winner = get_winner(prediction)
-            score += masters_scoring_bonuses.get(winner, [0, 0])[INDEX_BONUS_FOR_WINNER]
+    data = {
+        "posts" : [ (post.author, post.date.isoformat(), post.text) for post in posts ],
+        "posts_results" : [ post_result_to_json(post_result) for post_result in posts_results ]
+        }
+    write_json_atomically(os.path.join(cache_directory, cache_key + ".json"), data)
 
-            loser = get_loser(prediction)
-            score += masters_scoring_bonuses.get(loser, [0, 0])[INDEX_BONUS_FOR_LOSER]
+    # Evict the least recently used entries
+    cache_filenames = [
+        os.path.join(cache_directory, filename)
+        for filename in os.listdir(cache_directory)
+        if filename.endswith(".json") ]
+    cache_filenames.sort(key = os.path.getmtime, reverse = True)
+    for cache_filename in cache_filenames[max_entries:]:
+        os.remove(cache_filename)
 
-        scored_predictions.append(PredictionWithScore(
-            **prediction._asdict(),
-            score = score,
-            guessed = guessed))
+##############################################
 
-    return scored_predictions
+def normalise_predictions(official_results, predictions):
+    # The official results, then the predictions in post order,
+    # with the round fixed according to the tournament calendar,
+    # and only the latest prediction per (author, game, round).
+    # Everything is done in one pass over `predictions`, which can be a generator
 
-def assign_prediction_scores_3210(predictions, _, masters_scoring_bonuses):
-    def prediction_key(prediction):
+    def game(prediction):
         return (
             prediction.white_name,
             prediction.black_name,
             )
 
-    official_results = {
-        prediction_key(official_result) : official_result
-        for official_result in predictions
-        if official_result.author == "Official results"
+    rounds_per_game = {
+        game(official_result) : official_result.round
+        for official_result in official_results
         }
 
-    scored_predictions = []
-    for prediction in predictions:
-        score = 0
-        guessed = False
-        if prediction_key(prediction) in official_results.keys():
-            official_result = official_results[prediction_key(prediction)]
-            if prediction.outcome == "1" and official_result.outcome == "1R":
-                    score = 3
-                    guessed = True
-            elif prediction.outcome == "1" and official_result.outcome == "1A":
-                    score = 2
-                    guessed = True
-            elif prediction.outcome == "1" and official_result.outcome == "2A":
-                    score = 1
-            elif prediction.outcome == "2" and official_result.outcome == "2R":
-                    score = 3
-                    guessed = True
-            elif prediction.outcome == "2" and official_result.outcome == "2A":
-                    score = 2
-                    guessed = True
-            elif prediction.outcome == "2" and official_result.outcome == "1A":
-                    score = 1
-
-            if (guessed):
-                INDEX_BONUS_FOR_WINNER = 0
-                INDEX_BONUS_FOR_LOSER = 1
-
-                winner = get_winner(prediction)
-                score += masters_scoring_bonuses.get(winner, [0, 0])[INDEX_BONUS_FOR_WINNER]
-
-                loser = get_loser(prediction)
-                score += masters_scoring_bonuses.get(loser, [0, 0])[INDEX_BONUS_FOR_LOSER]
-
-        scored_predictions.append(PredictionWithScore(
-            **prediction._asdict(),
-            score = score,
-            guessed = guessed))
-
-    return scored_predictions
+    # (author, white, black, round) --> prediction.
+    # A later prediction replaces the earlier one and takes its place
+    # at the end of the dict, so the order is the one of the latest predictions
+    latest_predictions = {}
+
+    for prediction in itertools.chain(official_results, predictions):
+        if game(prediction) not in rounds_per_game:
+            write_err("Missing game in official results: " + str(prediction) + "\n")
+        else:
+            expected_round = rounds_per_game[game(prediction)]
+            assert expected_round is not None, "Missing round in official results for game" + str(prediction)
+
+            # If the given round does not match with the tournament calendar,
+            # write the correct round number.
+            # No warning if a wrong round was given (not useful)
+            if prediction.round != expected_round:
+                prediction = prediction._replace(round = expected_round)
+
+        prediction_key = (prediction.author, ) + game(prediction) + (prediction.round, )
+        latest_predictions.pop(prediction_key, None)
+        latest_predictions[prediction_key] = prediction
+
+    yield from latest_predictions.values()
 
 ##############################################
+# compact predictions
+
+# After parsing, predictions are kept as parallel columns of small integers,
+# authors and masters being replaced by their index in a names list;
+# the names are only looked up again to build the round entries
+
+PredictionTable = namedtuple("PredictionTable", [
+    "author_names",  # author id --> name
+    "master_names",  # master id --> name
+    # One entry per prediction:
+    "author_ids",
+    "white_ids",
+    "black_ids",
+    "outcome_codes",  # index in `outcomes`
+    "rounds",  # NO_ROUND if unknown
+    "scores",  # filled by the scoring functions
+    "guessed"])
+
+outcomes = ["1", "X", "2", "1R", "2R", "1A", "2A", "@"]
+outcome_codes = { outcome : code for code, outcome in enumerate(outcomes) }
+
+# Outcome code --> 0 if White won, 1 if Black won, None otherwise
+outcome_winner_sides = [
+    0 if outcome.startswith("1") else 1 if outcome.startswith("2") else None
+    for outcome in outcomes ]
+
+NO_ROUND = -1
+
+def build_prediction_table(predictions):
+    # One pass, so that `predictions` can be a generator
+    author_ids = {}
+    master_ids = {}
+
+    def intern(names_ids, name):
+        return names_ids.setdefault(name, len(names_ids))
+
+    prediction_table = PredictionTable(
+        author_names = None,
+        master_names = None,
+        author_ids = array.array("l"),
+        white_ids = array.array("l"),
+        black_ids = array.array("l"),
+        outcome_codes = array.array("b"),
+        rounds = array.array("l"),
+        scores = None,
+        guessed = None)
 
-def calculate_round_entries(all_predictions, tournament_data):
-    official_results = [
-        prediction
-        for prediction in all_predictions
-        if prediction.author == "Official results"
-        ]
+    for prediction in predictions:
+        prediction_table.author_ids.append(intern(author_ids, prediction.author))
+        prediction_table.white_ids.append(intern(master_ids, prediction.white_name))
+        prediction_table.black_ids.append(intern(master_ids, prediction.black_name))
+        prediction_table.outcome_codes.append(outcome_codes[prediction.outcome])
+        prediction_table.rounds.append(prediction.round if prediction.round is not None else NO_ROUND)
+
+    # dicts keep the insertion order, i.e. the ids
+    return prediction_table._replace(
+        author_names = list(author_ids.keys()),
+        master_names = list(master_ids.keys()))
+
+def get_official_author_id(prediction_table):
+    if "Official results" not in prediction_table.author_names:
+        return None
+    return prediction_table.author_names.index("Official results")
+
+def get_round_runs(rounds):
+    # (round, start, end) of every run of predictions of the same round:
+    # as the predictions are in post order, there are few runs per round,
+    # and the columns can be sliced instead of going through every prediction
+    round_runs = []
+    start = 0
+    for round, run in itertools.groupby(rounds):
+        end = start + len(list(run))
+        round_runs.append((round, start, end))
+        start = end
+    return round_runs
+
+def get_official_indices(prediction_table, start, end):
+    # Indices of the official results among the predictions from `start` to `end`
+    official_author_id = get_official_author_id(prediction_table)
+    return list(itertools.compress(range(start, end), map(
+        eq, prediction_table.author_ids[start:end], itertools.repeat(official_author_id))))
+
+# Column of the scoring matrices for the games without an official result
+NO_RESULT = len(outcomes)
+
+ScoringMatrix = namedtuple("ScoringMatrix", [
+    # (predicted outcome code, official outcome code or NO_RESULT) --> value,
+    # flattened: index predicted * (NO_RESULT + 1) + official
+    "scores",
+    "guessed"])
+
+def get_exact_outcome_scoring_system(score_1, score_X, score_2):
+    # Only the exact outcome is guessed
+    return {
+        "points" : { "1" : { "1" : score_1 }, "X" : { "X" : score_X }, "2" : { "2" : score_2 } },
+        "guessed" : { outcome : [ outcome ] for outcome in outcomes } }
+
+# Same format as "scoring_systems" in aux-data.json:
+# "points" is predicted outcome --> official outcome --> score (default 0),
+# "guessed" is predicted outcome --> official outcomes counting as guessed
+# (default: the ones with a positive score).
+# The masters bonuses are only added to the guessed predictions,
+# and a perfect round needs all of them guessed
+builtin_scoring_systems = {
+    "2_2_2" : get_exact_outcome_scoring_system(2, 2, 2),
+    "2_1_3" : get_exact_outcome_scoring_system(2, 1, 3),
+    "3_1_4" : get_exact_outcome_scoring_system(3, 1, 4),
+    # Rapid and armageddon tiebreaks
+    "3_2_1_0" : {
+        "points" : {
+            "1" : { "1R" : 3, "1A" : 2, "2A" : 1 },
+            "2" : { "2R" : 3, "2A" : 2, "1A" : 1 } },
+        "guessed" : {
+            "1" : [ "1R", "1A" ],
+            "2" : [ "2R", "2A" ] } },
+    }
+
+def compile_scoring_system(scoring_system_definition):
+    width = NO_RESULT + 1
+    scores = [0] * (len(outcomes) * width)
+    guessed = [False] * (len(outcomes) * width)
+
+    def get_cell(predicted, official):
+        assert predicted in outcome_codes and official in outcome_codes, \
+            "Unknown outcome in scoring system: {} / {}".format(predicted, official)
+        return outcome_codes[predicted] * width + outcome_codes[official]
 
-    authors = set(post.author for post in all_predictions)
-    rounds = sorted(list(set(prediction.round for prediction in official_results)))
+    for predicted, official_scores in scoring_system_definition["points"].items():
+        for official, score in official_scores.items():
+            scores[get_cell(predicted, official)] = score
+
+    if "guessed" in scoring_system_definition:
+        for predicted, officials in scoring_system_definition["guessed"].items():
+            for official in officials:
+                guessed[get_cell(predicted, official)] = True
+    else:
+        guessed = [ score > 0 for score in scores ]
+
+    return ScoringMatrix(scores = scores, guessed = guessed)
+
+def get_default_outcome_probabilities(scoring_system_definition):
+    # Equally likely outcomes: the tiebreak ones, if the scoring system
+    # gives points for them (as "3_2_1_0"), otherwise 1, X and 2
+    scored_outcomes = {
+        official
+        for official_scores in scoring_system_definition["points"].values()
+        for official in official_scores.keys() }
+    tiebreak_outcomes = [ "1R", "2R", "1A", "2A" ]
+    if scored_outcomes.isdisjoint(tiebreak_outcomes):
+        return { "1" : 1, "X" : 1, "2" : 1 }
+    return { outcome : 1 for outcome in tiebreak_outcomes }
+
+def get_masters_bonuses(prediction_table, masters_scoring_bonuses):
+    # Bonus of every prediction, as if it was guessed:
+    # masters_scoring_bonuses has [bonus for winner, bonus for loser]
+    winner_bonuses = [
+        masters_scoring_bonuses.get(master_name, [0, 0])[0]
+        for master_name in prediction_table.master_names ]
+    loser_bonuses = [
+        masters_scoring_bonuses.get(master_name, [0, 0])[1]
+        for master_name in prediction_table.master_names ]
+
+    return [
+        0 if winner_side is None
+        else winner_bonuses[white] + loser_bonuses[black] if winner_side == 0
+        else winner_bonuses[black] + loser_bonuses[white]
+        for white, black, winner_side in zip(
+            prediction_table.white_ids,
+            prediction_table.black_ids,
+            map(outcome_winner_sides.__getitem__, prediction_table.outcome_codes)) ]
+
+def select_predictions(prediction_table, runs):
+    # Same table, with only the predictions in the (start, end) runs
+    def select(column):
+        selected_column = array.array(column.typecode)
+        for start, end in runs:
+            selected_column.extend(column[start:end])
+        return selected_column
+
+    return prediction_table._replace(
+        author_ids = select(prediction_table.author_ids),
+        white_ids = select(prediction_table.white_ids),
+        black_ids = select(prediction_table.black_ids),
+        outcome_codes = select(prediction_table.outcome_codes),
+        rounds = select(prediction_table.rounds))
+
+def assign_prediction_scores(prediction_table, scoring_matrix, masters_scoring_bonuses, scored_runs = None):
+    # All predictions at once: every step is a pass over whole columns.
+    # If `scored_runs` are given, only the predictions in these (start, end)
+    # runs are scored (see the frozen rounds below), the others keep a zero score
+    full_table = prediction_table
+    if scored_runs is not None:
+        prediction_table = select_predictions(full_table, scored_runs)
+
+    official_author_id = get_official_author_id(prediction_table)
+
+    official_results = {
+        (white, black) : outcome_code
+        for author_id, white, black, outcome_code in zip(
+            prediction_table.author_ids,
+            prediction_table.white_ids,
+            prediction_table.black_ids,
+            prediction_table.outcome_codes)
+        if author_id == official_author_id }
+
+    matrix_scores, matrix_guessed = scoring_matrix
+    width = NO_RESULT + 1
+
+    cells = [
+        outcome_code * width + official_results.get((white, black), NO_RESULT)
+        for white, black, outcome_code in zip(
+            prediction_table.white_ids,
+            prediction_table.black_ids,
+            prediction_table.outcome_codes) ]
+
+    guessed = array.array("b", map(matrix_guessed.__getitem__, cells))
+    scores = array.array("l", (
+        matrix_scores[cell] + bonus if is_guessed else matrix_scores[cell]
+        for cell, is_guessed, bonus in zip(
+            cells, guessed, get_masters_bonuses(prediction_table, masters_scoring_bonuses)) ))
+
+    if scored_runs is not None:
+        selected_scores, selected_guessed = scores, guessed
+        scores = array.array("l", bytes(scores.itemsize * len(full_table.rounds)))
+        guessed = array.array("b", bytes(len(full_table.rounds)))
+        selected_start = 0
+        for start, end in scored_runs:
+            selected_end = selected_start + end - start
+            scores[start:end] = selected_scores[selected_start:selected_end]
+            guessed[start:end] = selected_guessed[selected_start:selected_end]
+            selected_start = selected_end
+
+    return full_table._replace(scores = scores, guessed = guessed)
+
+##############################################
+
+RoundTotals = namedtuple("RoundTotals", [
+    # author id --> sum over the own predictions of a round,
+    # without the bonus for a perfect round
+    "predictions_counts",
+    "scores",
+    "guessed_counts"])
+
+def get_round_totals(prediction_table, runs):
+    # Totals of the predictions in the (start, end) runs of a round
+    official_author_id = get_official_author_id(prediction_table)
+
+    predictions_counts = Counter()
+    scores = defaultdict(int)
+    guessed_counts = defaultdict(int)
+    for start, end in runs:
+        predictions_counts.update(prediction_table.author_ids[start:end])
+        for author_id, score, is_guessed in zip(
+                prediction_table.author_ids[start:end],
+                prediction_table.scores[start:end],
+                prediction_table.guessed[start:end]):
+            scores[author_id] += score
+            guessed_counts[author_id] += is_guessed
+
+    round_totals = RoundTotals(
+        predictions_counts = dict(predictions_counts),
+        scores = dict(scores),
+        guessed_counts = dict(guessed_counts))
+    for author_totals in round_totals:
+        author_totals.pop(official_author_id, None)
+    return round_totals
+
+def calculate_round_entries(prediction_table, tournament_data, rounds_totals = None):
+    # Group the predictions once, instead of filtering them
+    # for every round and author.
+    # `rounds_totals` (round --> RoundTotals) are calculated
+    # from the scores of the table, if not given
+    official_results_per_round = defaultdict(list)  # round --> prediction indices
+    runs_per_round = defaultdict(list)  # round --> (start, end)
+    for round, start, end in get_round_runs(prediction_table.rounds):
+        # Only the rounds with official results are rounds:
+        # the predictions of unknown games keep their own round
+        official_indices = get_official_indices(prediction_table, start, end)
+        if len(official_indices) > 0:
+            official_results_per_round[round].extend(official_indices)
+        runs_per_round[round].append((start, end))
+
+    # Every name has an id, in order of first appearance:
+    # same iteration order as a set of the names of all predictions
+    authors = set(prediction_table.author_names)
+    authors_ids = { author_name : author_id for author_id, author_name in enumerate(prediction_table.author_names) }
+    rounds = sorted(list(official_results_per_round.keys()))
+
+    if rounds_totals is None:
+        rounds_totals = {
+            round : get_round_totals(prediction_table, runs_per_round[round])
+            for round in rounds }
 
     round_entries = []
-    scores_per_rounds = []
+    author_cumulated_scores = defaultdict(int)  # author --> score up to the current round
+
+    X = outcome_codes["X"]
 
     authors_with_predictions = set()
     for round in rounds:
-        games_in_this_round = sum(
-            1
-            for prediction in official_results
-            if prediction.round == round
-            )
+        official_results_for_this_round = official_results_per_round[round]
+        round_totals = rounds_totals[round]
+
+        games_in_this_round = len(official_results_for_this_round)
 
         all_draws_in_this_round = all(
-            prediction.outcome == "X" 
-            for prediction in official_results
-            if prediction.round == round
+            prediction_table.outcome_codes[index] == X
+            for index in official_results_for_this_round
             )
 
         negate_bonus = ( tournament_data.negate_bonus_if_all_draws
                 and all_draws_in_this_round )
 
+        default_draw_predictions = [
+            index
+            for index in official_results_for_this_round
+            if prediction_table.outcome_codes[index] == X]
+        default_draw_score = sum(prediction_table.scores[index] for index in default_draw_predictions)
+        default_draw_guessed_count = sum(prediction_table.guessed[index] for index in default_draw_predictions)
+
         for author in authors:
             if author == "Official results":
                 continue
-                
-            author_predictions_for_this_round = [
-                prediction
-                for prediction in all_predictions
-                if prediction.author == author
-                    and prediction.round == round]
+
+            author_id = authors_ids[author]
+            author_predictions_count = round_totals.predictions_counts.get(author_id, 0)
+            author_score_for_this_round = round_totals.scores.get(author_id, 0)
+            author_good_predictions_count = round_totals.guessed_counts.get(author_id, 0)
 
             is_default_draw_entry = False
-            if len(author_predictions_for_this_round) > 0:
+            if author_predictions_count > 0:
                 authors_with_predictions.add(author)
             else:    
                 # “Pronostico di riserva”: if the author was a participant
@@ -733,72 +1365,288 @@ def calculate_round_entries(all_predictions, tournament_data):
                 # for this round had been given    
                 if (tournament_data.enable_default_draw_prediction
                         and author in authors_with_predictions):
-                    author_predictions_for_this_round = [
-                        prediction
-                        for prediction in official_results
-                        if prediction.round == round
-                        and prediction.outcome == "X"]
+                    author_predictions_count = len(default_draw_predictions)
+                    author_score_for_this_round = default_draw_score
+                    author_good_predictions_count = default_draw_guessed_count
                     is_default_draw_entry = True
-                    
-            author_score_for_this_round = sum(
-                prediction.score
-                for prediction in author_predictions_for_this_round)
 
             if (not negate_bonus):
                 # “Nel caso vengano indovinate tutte le partite di un turno,
                 # verranno assegnati 3 punti aggiuntivi.”
-                author_good_predictions_count = sum(
-                    1
-                    for prediction in author_predictions_for_this_round
-                    if prediction.guessed == True)
-                    
                 if (author_good_predictions_count == games_in_this_round):
                     author_score_for_this_round += tournament_data.bonus_for_perfect_round_prediction
 
-            scores_per_rounds.append( (round, author, author_score_for_this_round) )
-
-            author_cumulated_score = sum(
-                tuple[2]
-                for tuple in scores_per_rounds
-                if tuple[1] == author)
+            author_cumulated_scores[author] += author_score_for_this_round
 
             round_entries.append(RoundEntry(
-                round = round,
+                round = round if round != NO_ROUND else None,
                 author = author,
-                author_predictions_count = len(author_predictions_for_this_round),
+                author_predictions_count = author_predictions_count,
                 author_score = author_score_for_this_round,
-                author_cumulated_score = author_cumulated_score,
+                author_cumulated_score = author_cumulated_scores[author],
                 is_default_draw_entry = is_default_draw_entry))
 
     return round_entries
 
-def detect_abandoning_authors(round_entries):
-    authors = set(round_entry.author for round_entry in round_entries)
-
-    author_presences = []
-    for author in authors:
-        author_presence_days = sum(
-            1
-            for round_entry in round_entries
-            if round_entry.author == author and round_entry.is_default_draw_entry == False)
-        author_last_round = max(
-            round_entry.round
-            for round_entry in round_entries
-            if round_entry.author == author and round_entry.is_default_draw_entry == False)
-        author_presences.append((author, author_presence_days, author_last_round))
+##############################################
+# frozen rounds
+
+# The totals of every round are saved with the incremental state,
+# together with its official results and a signature of everything else
+# they depend on: the predictions (corrections included, and late ones,
+# as there is no deadline), who is entitled to the default draw prediction,
+# the scoring settings and the author and master names.
+# If the signature of a round is the same in the next run, its totals are
+# reused; if some of its results changed meanwhile, only the predictions
+# of the changed games are scored again, and their authors' totals patched
+FrozenRound = namedtuple("FrozenRound", [
+    "signature",
+    "official_outcomes",  # outcome codes of the official results of the round, in order
+    "round_totals"])
+
+RoundSignature = namedtuple("RoundSignature", [
+    "signature",
+    "official_outcomes"])
+
+def frozen_round_to_json(frozen_round):
+    return [ frozen_round.signature, frozen_round.official_outcomes, list(frozen_round.round_totals) ]
+
+def frozen_round_from_json(entry):
+    # The JSON keys are strings
+    signature, official_outcomes, round_totals = entry
+    return FrozenRound(
+        signature = signature,
+        official_outcomes = official_outcomes,
+        round_totals = RoundTotals(*(
+            { int(author_id) : value for author_id, value in author_totals.items() }
+            for author_totals in round_totals )))
+
+def get_rounds_signatures(prediction_table, tournament_data):
+    # round --> RoundSignature, for the rounds with official results.
+    # The columns are hashed as they are: the ids only mean the same
+    # if the names are the same, so these are hashed too
+    official_results_per_round = defaultdict(list)  # round --> prediction indices
+    runs_per_round = defaultdict(list)  # round --> (start, end)
+    for round, start, end in get_round_runs(prediction_table.rounds):
+        # Only the rounds with official results are rounds:
+        # the predictions of unknown games keep their own round
+        official_indices = get_official_indices(prediction_table, start, end)
+        if len(official_indices) > 0:
+            official_results_per_round[round].extend(official_indices)
+        runs_per_round[round].append((start, end))
+
+    common_inputs = [
+        prediction_table.author_names,
+        prediction_table.master_names,
+        tournament_data.scoring_matrix,
+        tournament_data.masters_scoring_bonuses,
+        tournament_data.bonus_for_perfect_round_prediction,
+        tournament_data.negate_bonus_if_all_draws,
+        tournament_data.enable_default_draw_prediction,
+        ]
+    common_hash = hashlib.sha1(json.dumps(common_inputs, sort_keys = True, ensure_ascii = False).encode("utf-8"))
+
+    unknown_outcome_code = outcome_codes["@"]
+
+    rounds_signatures = {}
+    # Decide who gets a default draw prediction, like in calculate_round_entries
+    authors_with_predictions = set()
+    for round in sorted(official_results_per_round.keys()):
+        official_results_for_this_round = official_results_per_round[round]
+
+        round_hash = common_hash.copy()
+        round_hash.update(str(round).encode("utf-8"))
+        for start, end in runs_per_round[round]:
+            # The official outcomes are compared one by one instead
+            round_outcome_codes = prediction_table.outcome_codes[start:end]
+            for index in official_results_for_this_round:
+                if start <= index < end:
+                    round_outcome_codes[index - start] = unknown_outcome_code
+
+            round_hash.update(prediction_table.author_ids[start:end].tobytes())
+            round_hash.update(prediction_table.white_ids[start:end].tobytes())
+            round_hash.update(prediction_table.black_ids[start:end].tobytes())
+            round_hash.update(round_outcome_codes.tobytes())
+        round_hash.update(array.array("l", sorted(authors_with_predictions)).tobytes())
+
+        if round != NO_ROUND:
+            rounds_signatures[round] = RoundSignature(
+                signature = round_hash.hexdigest(),
+                official_outcomes = [
+                    prediction_table.outcome_codes[index]
+                    for index in official_results_for_this_round ])
+
+        for start, end in runs_per_round[round]:
+            authors_with_predictions.update(prediction_table.author_ids[start:end])
+
+    return rounds_signatures
+
+def patch_round_totals(prediction_table, round_totals, runs, changed_results,
+        scoring_matrix, masters_scoring_bonuses):
+    # Round totals after the change of the official results `changed_results`,
+    # (prediction index of the official result, previous outcome code):
+    # the difference is made by the predictions of the changed games only
+    official_author_id = get_official_author_id(prediction_table)
+    matrix_scores, matrix_guessed = scoring_matrix
+    width = NO_RESULT + 1
+
+    def get_score(cell, bonus):
+        return matrix_scores[cell] + bonus if matrix_guessed[cell] else matrix_scores[cell]
+
+    scores = dict(round_totals.scores)
+    guessed_counts = dict(round_totals.guessed_counts)
+
+    for official_index, previous_official_code in changed_results:
+        white = prediction_table.white_ids[official_index]
+        black = prediction_table.black_ids[official_index]
+        official_code = prediction_table.outcome_codes[official_index]
+
+        # game --> predictions, by slicing the columns
+        game_indices = [
+            index
+            for start, end in runs
+            for index in itertools.compress(range(start, end), map(and_,
+                map(eq, prediction_table.white_ids[start:end], itertools.repeat(white)),
+                map(eq, prediction_table.black_ids[start:end], itertools.repeat(black)))) ]
+        game_table = select_predictions(prediction_table, [ (index, index + 1) for index in game_indices ])
+
+        for author_id, outcome_code, bonus in zip(
+                game_table.author_ids,
+                game_table.outcome_codes,
+                get_masters_bonuses(game_table, masters_scoring_bonuses)):
+            if author_id == official_author_id:
+                continue
+            previous_cell = outcome_code * width + previous_official_code
+            cell = outcome_code * width + official_code
+            scores[author_id] += get_score(cell, bonus) - get_score(previous_cell, bonus)
+            guessed_counts[author_id] += matrix_guessed[cell] - matrix_guessed[previous_cell]
+
+    return round_totals._replace(scores = scores, guessed_counts = guessed_counts)
+
+def calculate_round_entries_memoized(prediction_table, tournament_data, frozen_rounds):
+    # Like assign_prediction_scores and calculate_round_entries,
+    # only scoring the rounds which are not in `frozen_rounds` or changed since,
+    # and the changed games of the others.
+    # Returns the scored table, the round entries and the frozen rounds to save
+    rounds_signatures = get_rounds_signatures(prediction_table, tournament_data)
+
+    runs_per_round = defaultdict(list)  # round --> (start, end)
+    for round, start, end in get_round_runs(prediction_table.rounds):
+        runs_per_round[round].append((start, end))
+
+    # The official results of a game are looked up by game,
+    # so a game played twice cannot be patched
+    official_games = Counter(
+        (prediction_table.white_ids[index], prediction_table.black_ids[index])
+        for _, start, end in get_round_runs(prediction_table.rounds)
+        for index in get_official_indices(prediction_table, start, end))
+
+    rounds_totals = {}  # of the frozen rounds
+    scored_runs = []
+    patched_games_count = 0
+    for round, runs in runs_per_round.items():
+        round_signature = rounds_signatures.get(round)
+        frozen_round = frozen_rounds.get(round)
+        if (round_signature is None or frozen_round is None
+                or frozen_round.signature != round_signature.signature):
+            scored_runs.extend(runs)
+            continue
+
+        official_results_for_this_round = [
+            index
+            for start, end in runs
+            for index in get_official_indices(prediction_table, start, end) ]
+        changed_results = [
+            (index, previous_official_code)
+            for index, previous_official_code, official_code in zip(
+                official_results_for_this_round,
+                frozen_round.official_outcomes,
+                round_signature.official_outcomes)
+            if previous_official_code != official_code ]
+        if any(official_games[(prediction_table.white_ids[index], prediction_table.black_ids[index])] > 1
+                for index, _ in changed_results):
+            scored_runs.extend(runs)
+            continue
+
+        rounds_totals[round] = patch_round_totals(prediction_table, frozen_round.round_totals,
+            runs, changed_results, tournament_data.scoring_matrix, tournament_data.masters_scoring_bonuses)
+        patched_games_count += len(changed_results)
+        # For the default draw predictions
+        scored_runs.extend((index, index + 1) for index in official_results_for_this_round)
+
+    prediction_table = assign_prediction_scores(prediction_table,
+        tournament_data.scoring_matrix, tournament_data.masters_scoring_bonuses,
+        scored_runs = sorted(scored_runs))
+
+    # The predictions of games not in the official results are scored too,
+    # but do not make a round
+    rounds_count = len(rounds_signatures)
+    write_err("Scored {} rounds out of {}, and {} changed games\n".format(
+        rounds_count - len(rounds_totals), rounds_count, patched_games_count))
+
+    for round, runs in runs_per_round.items():
+        if round not in rounds_totals:
+            rounds_totals[round] = get_round_totals(prediction_table, runs)
+
+    round_entries = calculate_round_entries(prediction_table, tournament_data, rounds_totals)
+
+    new_frozen_rounds = {
+        round : FrozenRound(
+            signature = round_signature.signature,
+            official_outcomes = round_signature.official_outcomes,
+            round_totals = rounds_totals[round])
+        for round, round_signature in rounds_signatures.items() }
+
+    return prediction_table, round_entries, new_frozen_rounds
+
+##############################################
+
+StandingsIndex = namedtuple("StandingsIndex", [
+    "authors",  # set
+    "author_total_scores",  # author --> sum of the round scores
+    "author_presences",  # author --> rounds with own predictions
+    "author_last_active_rounds",  # author --> last round with own predictions
+    "round_entries_per_round"])  # round --> round entries, in the original order
+
+def build_standings_index(round_entries):
+    # One pass over the round entries,
+    # shared by the functions needing per-author or per-round data
+    author_total_scores = defaultdict(int)
+    author_presences = defaultdict(int)
+    author_last_active_rounds = {}
+    round_entries_per_round = defaultdict(list)
+
+    for round_entry in round_entries:
+        author = round_entry.author
+        author_total_scores[author] += round_entry.author_score
+        if not round_entry.is_default_draw_entry:
+            author_presences[author] += 1
+            author_last_active_rounds[author] = max(
+                round_entry.round, author_last_active_rounds.get(author, round_entry.round))
+        round_entries_per_round[round_entry.round].append(round_entry)
+
+    return StandingsIndex(
+        # Same iteration order as before the index
+        authors = set(round_entry.author for round_entry in round_entries),
+        author_total_scores = author_total_scores,
+        author_presences = author_presences,
+        author_last_active_rounds = author_last_active_rounds,
+        round_entries_per_round = round_entries_per_round)
+
+def detect_abandoning_authors(standings_index):
+    author_presences = [
+        (author,
+            standings_index.author_presences[author],
+            standings_index.author_last_active_rounds[author])
+        for author in standings_index.authors ]
 
     author_presences = sorted(author_presences, key = lambda entry: entry[2])
     write_out(f"num_pres, last_round: {author_presences}")
 
-def calculate_grand_total_entries(round_entries, ranking_scores):
-    authors = set(round_entry.author for round_entry in round_entries)
-
+def calculate_grand_total_entries(standings_index, ranking_scores):
     grand_total_entries = []
-    for author in authors:
-        author_predictions_score = sum(
-            round_entry.author_score
-            for round_entry in round_entries
-            if round_entry.author == author)
+    for author in standings_index.authors:
+        author_predictions_score = standings_index.author_total_scores[author]
 
         if author_predictions_score > 10 and author not in ranking_scores:
             write_err("Suspect missing ranking for {}\n".format(author))
@@ -868,14 +1716,11 @@ def assign_ranking_scores(rankings, tournament_data):
 
     return ranking_scores
 
-def print_round_results(round_entries):
-    rounds = sorted(list(set(round_entry.round for round_entry in round_entries)))
+def print_round_results(standings_index):
+    rounds = sorted(list(standings_index.round_entries_per_round.keys()))
 
     for round in rounds:
-        round_entries_for_this_round = [
-            round_entry
-            for round_entry in round_entries
-            if round_entry.round == round ]
+        round_entries_for_this_round = list(standings_index.round_entries_per_round[round])
 
         # sort by descending score, then by name
         round_entries_for_this_round.sort( key = lambda round_entry: (-round_entry.author_score, round_entry.author.lower()) )
@@ -918,6 +1763,621 @@ def print_final_results(grand_total_entries):
         write_out("%s : %d\n" % (author, author_final_score))
     write_out("────────────────────────────────\n")
 
+##############################################
+# remaining games
+
+# What the unplayed games ("@" in tournament.txt) can still give to every author,
+# with the predictions already posted: used by --chances and --contenders.
+# The authors are referred to by their index in a list of authors
+
+UnplayedRound = namedtuple("UnplayedRound", [
+    "round",  # as in the round entries
+    "unplayed_games_start",  # in the list of all unplayed games
+    "unplayed_games_count",
+    "fixed_scores",  # author --> score from the played games
+    "perfect_candidates",  # bit mask of the authors who guessed all the played games
+    "unplayed_scores",  # [game][outcome code] --> author --> score
+    "unplayed_guessed",  # [game][outcome code] --> bit mask of the authors who guessed it
+    "can_be_all_draws"])  # all played games are draws, and the bonus can be negated
+
+def get_unplayed_rounds(prediction_table, standings_index, authors, tournament_data):
+    # UnplayedRound for every round with unplayed games
+    official_author_id = get_official_author_id(prediction_table)
+    authors_indices = { author : index for index, author in enumerate(authors) }
+    authors_ids = { author_name : author_id for author_id, author_name in enumerate(prediction_table.author_names) }
+    matrix_scores, matrix_guessed = tournament_data.scoring_matrix
+    width = NO_RESULT + 1
+    UNPLAYED = outcome_codes["@"]
+    X = outcome_codes["X"]
+
+    official_results = {}  # (white, black) --> outcome code
+    official_games_per_round = defaultdict(list)  # round --> [(white, black)]
+    predictions_per_author_and_round = defaultdict(list)  # --> prediction indices
+    for index, (author_id, white, black, outcome_code, round) in enumerate(zip(
+            prediction_table.author_ids,
+            prediction_table.white_ids,
+            prediction_table.black_ids,
+            prediction_table.outcome_codes,
+            prediction_table.rounds)):
+        if author_id == official_author_id:
+            official_results[(white, black)] = outcome_code
+            official_games_per_round[round].append((white, black))
+        predictions_per_author_and_round[(author_id, round)].append(index)
+
+    masters_bonuses = get_masters_bonuses(prediction_table, tournament_data.masters_scoring_bonuses)
+
+    unplayed_rounds = []
+    unplayed_games_start = 0
+    for round, games in sorted(official_games_per_round.items()):
+        unplayed_games = [ game for game in games if official_results[game] == UNPLAYED ]
+        if len(unplayed_games) == 0:
+            continue
+        unplayed_games_indices = { game : index for index, game in enumerate(unplayed_games) }
+
+        fixed_scores = [0] * len(authors)
+        fixed_guessed_counts = [0] * len(authors)
+        unplayed_scores = [ [ [0] * len(authors) for _ in outcomes ] for _ in unplayed_games ]
+        unplayed_guessed = [ [ 0 for _ in outcomes ] for _ in unplayed_games ]
+
+        round_entries_round = round if round != NO_ROUND else None
+        for round_entry in standings_index.round_entries_per_round[round_entries_round]:
+            author_index = authors_indices[round_entry.author]
+
+            # (game, predicted outcome code, masters bonus if guessed)
+            if round_entry.is_default_draw_entry:
+                author_predictions = [ (game, X, 0) for game in games ]
+            else:
+                author_predictions = [
+                    ((prediction_table.white_ids[index], prediction_table.black_ids[index]),
+                        prediction_table.outcome_codes[index],
+                        masters_bonuses[index])
+                    for index in predictions_per_author_and_round[(authors_ids[round_entry.author], round)] ]
+
+            for game, outcome_code, bonus in author_predictions:
+                if game in unplayed_games_indices:
+                    game_index = unplayed_games_indices[game]
+                    for official_outcome_code in range(len(outcomes)):
+                        cell = outcome_code * width + official_outcome_code
+                        if matrix_guessed[cell]:
+                            unplayed_scores[game_index][official_outcome_code][author_index] += matrix_scores[cell] + bonus
+                            unplayed_guessed[game_index][official_outcome_code] |= 1 << author_index
+                        else:
+                            unplayed_scores[game_index][official_outcome_code][author_index] += matrix_scores[cell]
+                else:
+                    cell = outcome_code * width + official_results.get(game, NO_RESULT)
+                    if matrix_guessed[cell]:
+                        fixed_scores[author_index] += matrix_scores[cell] + bonus
+                        fixed_guessed_counts[author_index] += 1
+                    else:
+                        fixed_scores[author_index] += matrix_scores[cell]
+
+        played_games_count = len(games) - len(unplayed_games)
+        unplayed_rounds.append(UnplayedRound(
+            round = round_entries_round,
+            unplayed_games_start = unplayed_games_start,
+            unplayed_games_count = len(unplayed_games),
+            fixed_scores = fixed_scores,
+            perfect_candidates = sum(
+                1 << author_index
+                for author_index, guessed_count in enumerate(fixed_guessed_counts)
+                if guessed_count == played_games_count),
+            unplayed_scores = unplayed_scores,
+            unplayed_guessed = unplayed_guessed,
+            can_be_all_draws = tournament_data.negate_bonus_if_all_draws and all(
+                official_results[game] == X
+                for game in games
+                if game not in unplayed_games_indices)))
+        unplayed_games_start += len(unplayed_games)
+
+    return unplayed_rounds
+
+def get_base_scores(standings_index, ranking_scores, authors, unplayed_rounds):
+    # Final scores without the rounds with unplayed games
+    base_scores = [
+        standings_index.author_total_scores[author] + ranking_scores.get(author, 0)
+        for author in authors ]
+    authors_indices = { author : index for index, author in enumerate(authors) }
+    for unplayed_round in unplayed_rounds:
+        for round_entry in standings_index.round_entries_per_round[unplayed_round.round]:
+            base_scores[authors_indices[round_entry.author]] -= round_entry.author_score
+    return base_scores
+
+def get_possible_outcome_codes(tournament_data):
+    return [
+        outcome_codes[outcome]
+        for outcome, probability in tournament_data.outcome_probabilities.items()
+        if probability > 0 ]
+
+##############################################
+# chances to win
+
+# The unplayed games get random outcomes, and the final standings
+# are calculated for each simulation.
+# The scores of all authors are packed as fields of one big integer,
+# so that adding the points of a game to every author is a single addition;
+# the packed points are prepared once per group of games and outcomes.
+# Identical simulations are only evaluated once
+
+# Bit fields of the packed scores: the score, offset by SCORE_BIAS to stay positive,
+# followed by the author index in the lowest bits, so that every value is unique
+# and tells its author
+SCORE_FIELD_TYPECODE = "I"
+SCORE_FIELD_BITS = 8 * array.array(SCORE_FIELD_TYPECODE).itemsize
+SCORE_BIAS = 1 << (SCORE_FIELD_BITS // 2)
+
+# Unplayed games whose outcomes are looked up together
+GAMES_GROUP_SIZE = 4
+
+PackedRound = namedtuple("PackedRound", [
+    "unplayed_games_start",  # in the outcome codes of a simulation
+    "unplayed_games_count",
+    "fixed_scores",  # packed scores from the played games
+    "perfect_candidates",  # bit mask of the authors who guessed all the played games
+    # Groups of unplayed games:
+    # (start, end) --> { outcome codes bytes --> (packed scores, bit mask of the authors who guessed all) }
+    "games_groups",
+    "can_be_all_draws"])
+
+def pack_scores(scores):
+    return sum(score << (SCORE_FIELD_BITS * index) for index, score in enumerate(scores))
+
+def unpack_scores(packed_scores, authors_count):
+    scores = array.array(SCORE_FIELD_TYPECODE)
+    scores.frombytes(packed_scores.to_bytes(authors_count * scores.itemsize, "little"))
+    if sys.byteorder == "big":
+        scores.byteswap()
+    return scores
+
+def sample_outcome_codes(outcome_probabilities, count, rng):
+    # `count` random outcome codes, as bytes.
+    # Random bytes are mapped to outcomes with bytes.translate;
+    # for that, the probabilities are rounded to multiples of 1/252
+    # (exact for halves, thirds, quarters, sixths...), and the bytes 252-255 discarded
+    SAMPLES_RANGE = 252
+    total_weight = sum(outcome_probabilities.values())
+
+    translation_table = bytearray(256)
+    cumulated_weight = 0
+    byte = 0
+    for outcome, weight in outcome_probabilities.items():
+        cumulated_weight += weight
+        end_byte = round(SAMPLES_RANGE * cumulated_weight / total_weight)
+        translation_table[byte : end_byte] = bytes([outcome_codes[outcome]]) * (end_byte - byte)
+        byte = end_byte
+    discarded_bytes = bytes(range(SAMPLES_RANGE, 256))
+
+    samples = bytearray()
+    while len(samples) < count:
+        missing_count = count - len(samples)
+        samples += rng.randbytes(missing_count + missing_count // 32 + 16).translate(
+            translation_table, discarded_bytes)
+    return bytes(samples[:count])
+
+def pack_round(unplayed_round, possible_outcome_codes, authors_count):
+    # Every combination of outcomes of every group of games
+    all_authors = (1 << authors_count) - 1
+    games_groups = {}
+    for group_start in range(0, unplayed_round.unplayed_games_count, GAMES_GROUP_SIZE):
+        group_games_indices = range(group_start, min(group_start + GAMES_GROUP_SIZE, unplayed_round.unplayed_games_count))
+        group_outcomes = {}
+        for group_outcome_codes in itertools.product(possible_outcome_codes, repeat = len(group_games_indices)):
+            group_scores = 0
+            group_guessed = all_authors
+            for game_index, outcome_code in zip(group_games_indices, group_outcome_codes):
+                group_scores += pack_scores(unplayed_round.unplayed_scores[game_index][outcome_code])
+                group_guessed &= unplayed_round.unplayed_guessed[game_index][outcome_code]
+            group_outcomes[bytes(group_outcome_codes)] = (group_scores, group_guessed)
+        games_groups[(
+            unplayed_round.unplayed_games_start + group_games_indices.start,
+            unplayed_round.unplayed_games_start + group_games_indices.stop)] = group_outcomes
+
+    return PackedRound(
+        unplayed_games_start = unplayed_round.unplayed_games_start,
+        unplayed_games_count = unplayed_round.unplayed_games_count,
+        fixed_scores = pack_scores(unplayed_round.fixed_scores),
+        perfect_candidates = unplayed_round.perfect_candidates,
+        games_groups = games_groups,
+        can_be_all_draws = unplayed_round.can_be_all_draws)
+
+def get_round_packed_scores(packed_round, simulation, bonus_for_perfect_round_prediction):
+    # Packed scores of all authors in the round,
+    # given the outcome codes of all the unplayed games
+    packed_scores = packed_round.fixed_scores
+    perfect_authors = packed_round.perfect_candidates
+    for (start, end), group_outcomes in packed_round.games_groups.items():
+        group_scores, group_guessed = group_outcomes[simulation[start : end]]
+        packed_scores += group_scores
+        perfect_authors &= group_guessed
+
+    if perfect_authors and packed_round.can_be_all_draws:
+        round_outcome_codes = simulation[packed_round.unplayed_games_start :
+            packed_round.unplayed_games_start + packed_round.unplayed_games_count]
+        if round_outcome_codes.count(outcome_codes["X"]) == len(round_outcome_codes):
+            perfect_authors = 0
+
+    while perfect_authors:
+        author_index = perfect_authors.bit_length() - 1
+        packed_scores += bonus_for_perfect_round_prediction << (SCORE_FIELD_BITS * author_index)
+        perfect_authors ^= 1 << author_index
+
+    return packed_scores
+
+PackedStandings = namedtuple("PackedStandings", [
+    "authors_count",
+    "base_scores",  # packed, SCORE_BIAS included
+    "rounds",  # PackedRound
+    "author_index_bits",
+    "authors_indices",  # packed
+    "bonus_for_perfect_round_prediction"])
+
+def get_packed_standings(unplayed_rounds, base_scores, possible_outcome_codes, tournament_data):
+    author_index_bits = len(base_scores).bit_length()
+    assert SCORE_BIAS << (author_index_bits + 1) <= 1 << SCORE_FIELD_BITS, "Too many authors"
+
+    return PackedStandings(
+        authors_count = len(base_scores),
+        base_scores = pack_scores(base_score + SCORE_BIAS for base_score in base_scores),
+        rounds = [
+            pack_round(unplayed_round, possible_outcome_codes, len(base_scores))
+            for unplayed_round in unplayed_rounds ],
+        author_index_bits = author_index_bits,
+        authors_indices = pack_scores(range(len(base_scores))),
+        bonus_for_perfect_round_prediction = tournament_data.bonus_for_perfect_round_prediction)
+
+def get_final_values(packed_standings, simulation):
+    # (final score << author_index_bits) + author index of every author,
+    # given the outcome codes of all the unplayed games
+    packed_scores = packed_standings.base_scores
+    for packed_round in packed_standings.rounds:
+        packed_scores += get_round_packed_scores(packed_round, simulation,
+            packed_standings.bonus_for_perfect_round_prediction)
+
+    return unpack_scores(
+        (packed_scores << packed_standings.author_index_bits) + packed_standings.authors_indices,
+        packed_standings.authors_count)
+
+def simulate_chances(prediction_table, standings_index, ranking_scores, tournament_data, simulations_count, rng):
+    # author --> (probability of finishing first, probability of finishing in the first three);
+    # ties count for all the tied authors
+    authors = sorted(standings_index.authors)
+    unplayed_rounds = get_unplayed_rounds(prediction_table, standings_index, authors, tournament_data)
+    packed_standings = get_packed_standings(unplayed_rounds,
+        get_base_scores(standings_index, ranking_scores, authors, unplayed_rounds),
+        get_possible_outcome_codes(tournament_data), tournament_data)
+    author_index_bits = packed_standings.author_index_bits
+    author_index_mask = (1 << author_index_bits) - 1
+
+    # The outcome codes of the unplayed games, one bytes per simulation
+    unplayed_games_count = sum(unplayed_round.unplayed_games_count for unplayed_round in unplayed_rounds)
+    if unplayed_games_count == 0:
+        simulations = Counter({ bytes() : simulations_count })
+    else:
+        samples = sample_outcome_codes(tournament_data.outcome_probabilities,
+            simulations_count * unplayed_games_count, rng)
+        simulations = Counter(
+            samples[start : start + unplayed_games_count]
+            for start in range(0, len(samples), unplayed_games_count))
+
+    first_counts = [0] * len(authors)
+    podium_counts = [0] * len(authors)
+    for simulation, simulation_count in simulations.items():
+        final_values = get_final_values(packed_standings, simulation)
+        top_values = sorted(final_values, reverse = True)
+
+        first_score = top_values[0] >> author_index_bits
+        podium_score = top_values[min(2, len(top_values) - 1)] >> author_index_bits
+        for value in top_values:
+            score = value >> author_index_bits
+            if score < podium_score:
+                break
+            podium_counts[value & author_index_mask] += simulation_count
+            if score == first_score:
+                first_counts[value & author_index_mask] += simulation_count
+
+    return {
+        author : (first_counts[index] / simulations_count, podium_counts[index] / simulations_count)
+        for index, author in enumerate(authors) }
+
+def print_chances(chances, simulations_count):
+    chances_entries = list(chances.items())
+
+    # sort by descending chances, then by name
+    chances_entries.sort( key = lambda entry: (-entry[1][0], -entry[1][1], entry[0].lower()) )
+    write_out("\n────────────────────────────────\n")
+    write_out("Probabilità di vittoria e di podio (%d simulazioni)\n\n" % (simulations_count))
+    for author, (first_probability, podium_probability) in chances_entries:
+        write_out("%s : %.1f%% - %.1f%%\n" % (author, 100 * first_probability, 100 * podium_probability))
+    write_out("────────────────────────────────\n")
+
+##############################################
+# contenders
+
+# Who can still finish first (ties included) whatever the outcomes of the
+# unplayed games, with the predictions already posted.
+# The score differences between two authors are bounded round by round,
+# exactly: within a round, the only coupling between the games is the
+# perfect round bonus (and its negation if all games are draws), so the best
+# difference over the games from the j-th on only depends on which of these
+# conditions still hold. A search over the outcomes, pruned with these bounds,
+# is only needed for the authors not settled by the bounds alone
+
+class ContenderStatus(Enum):
+    CLINCHED = "primo posto assicurato"
+    ALIVE = "in corsa"
+    ELIMINATED = "eliminato"
+
+# Conditions still holding after some games of a round
+PLUS_AUTHOR_PERFECT = 1
+MINUS_AUTHOR_PERFECT = 2
+ALL_DRAWS = 4
+
+def get_round_best_differences(unplayed_round, possible_outcome_codes, bonus_for_perfect_round_prediction,
+        plus_author_index, minus_author_index):
+    # Best value of (score of the plus author - score of the minus author)
+    # in the unplayed games of the round, bonus included;
+    # either author can be None, scoring nothing.
+    # Returns best_differences[j][conditions], for the games from the j-th on,
+    # and the conditions at the start of the round
+    X = outcome_codes["X"]
+    unplayed_games_count = unplayed_round.unplayed_games_count
+
+    def get_author_bit(author_index):
+        return 1 << author_index if author_index is not None else 0
+    plus_author_bit = get_author_bit(plus_author_index)
+    minus_author_bit = get_author_bit(minus_author_index)
+
+    best_differences = [ [0] * 8 for _ in range(unplayed_games_count + 1) ]
+    for conditions in range(8):
+        if not conditions & ALL_DRAWS:
+            best_differences[unplayed_games_count][conditions] = bonus_for_perfect_round_prediction * (
+                bool(conditions & PLUS_AUTHOR_PERFECT) - bool(conditions & MINUS_AUTHOR_PERFECT))
+
+    for game_index in reversed(range(unplayed_games_count)):
+        game_scores = unplayed_round.unplayed_scores[game_index]
+        game_guessed = unplayed_round.unplayed_guessed[game_index]
+
+        outcome_transitions = []  # (difference, conditions kept)
+        for outcome_code in possible_outcome_codes:
+            difference = 0
+            if plus_author_index is not None:
+                difference += game_scores[outcome_code][plus_author_index]
+            if minus_author_index is not None:
+                difference -= game_scores[outcome_code][minus_author_index]
+            kept_conditions = (
+                (PLUS_AUTHOR_PERFECT if game_guessed[outcome_code] & plus_author_bit else 0)
+                | (MINUS_AUTHOR_PERFECT if game_guessed[outcome_code] & minus_author_bit else 0)
+                | (ALL_DRAWS if outcome_code == X else 0))
+            outcome_transitions.append((difference, kept_conditions))
+
+        for conditions in range(8):
+            best_differences[game_index][conditions] = max(
+                difference + best_differences[game_index + 1][conditions & kept_conditions]
+                for difference, kept_conditions in outcome_transitions)
+
+    start_conditions = (
+        (PLUS_AUTHOR_PERFECT if unplayed_round.perfect_candidates & plus_author_bit else 0)
+        | (MINUS_AUTHOR_PERFECT if unplayed_round.perfect_candidates & minus_author_bit else 0)
+        | (ALL_DRAWS if unplayed_round.can_be_all_draws else 0))
+
+    return best_differences, start_conditions
+
+def get_best_difference(unplayed_rounds, possible_outcome_codes, bonus_for_perfect_round_prediction,
+        base_scores, plus_author_index, minus_author_index):
+    # Best final (score of the plus author - score of the minus author), as above
+    best_difference = 0
+    for author_index, sign in ((plus_author_index, 1), (minus_author_index, -1)):
+        if author_index is not None:
+            best_difference += sign * (base_scores[author_index]
+                + sum(unplayed_round.fixed_scores[author_index] for unplayed_round in unplayed_rounds))
+
+    for unplayed_round in unplayed_rounds:
+        best_differences, start_conditions = get_round_best_differences(unplayed_round,
+            possible_outcome_codes, bonus_for_perfect_round_prediction, plus_author_index, minus_author_index)
+        best_difference += best_differences[0][start_conditions]
+
+    return best_difference
+
+RivalBounds = namedtuple("RivalBounds", [
+    "rival_index",
+    "rounds_tables",  # round --> (best differences, start conditions), author minus rival
+    "fixed_difference",  # from the base scores and the played games
+    "following_rounds_differences"])  # round --> best difference from the following rounds
+
+def get_rival_bounds(unplayed_rounds, possible_outcome_codes, bonus_for_perfect_round_prediction,
+        base_scores, author_index, rival_index):
+    rounds_tables = [
+        get_round_best_differences(unplayed_round, possible_outcome_codes,
+            bonus_for_perfect_round_prediction, author_index, rival_index)
+        for unplayed_round in unplayed_rounds ]
+
+    following_rounds_differences = [0] * len(unplayed_rounds)
+    for round_index in reversed(range(len(unplayed_rounds) - 1)):
+        best_differences, start_conditions = rounds_tables[round_index + 1]
+        following_rounds_differences[round_index] = (following_rounds_differences[round_index + 1]
+            + best_differences[0][start_conditions])
+
+    return RivalBounds(
+        rival_index = rival_index,
+        rounds_tables = rounds_tables,
+        fixed_difference = base_scores[author_index] - base_scores[rival_index] + sum(
+            unplayed_round.fixed_scores[author_index] - unplayed_round.fixed_scores[rival_index]
+            for unplayed_round in unplayed_rounds),
+        following_rounds_differences = following_rounds_differences)
+
+def find_first_place_outcomes(unplayed_rounds, possible_outcome_codes, author_index, rivals_bounds):
+    # Outcome codes of all the unplayed games (bytes) leaving the author
+    # at least level with the given rivals, or None.
+    # Depth-first search over the games, keeping for every rival
+    # the difference so far and the conditions of the current round;
+    # a branch is abandoned when a rival stays ahead even in the best case
+    X = outcome_codes["X"]
+
+    # (round index, game index) of every unplayed game, and its outcomes,
+    # the best ones for the author first
+    games = [
+        (round_index, game_index)
+        for round_index, unplayed_round in enumerate(unplayed_rounds)
+        for game_index in range(unplayed_round.unplayed_games_count) ]
+    games_outcome_codes = [
+        sorted(possible_outcome_codes,
+            key = lambda outcome_code: -unplayed_rounds[round_index].unplayed_scores[game_index][outcome_code][author_index])
+        for round_index, game_index in games ]
+
+    chosen_outcome_codes = bytearray(len(games))
+
+    def search(position, differences, conditions):
+        if position == len(games):
+            return True
+
+        round_index, game_index = games[position]
+        unplayed_round = unplayed_rounds[round_index]
+        is_last_game_of_round = game_index == unplayed_round.unplayed_games_count - 1
+
+        for outcome_code in games_outcome_codes[position]:
+            game_scores = unplayed_round.unplayed_scores[game_index][outcome_code]
+            game_guessed = unplayed_round.unplayed_guessed[game_index][outcome_code]
+            author_score = game_scores[author_index]
+            kept_conditions = ((PLUS_AUTHOR_PERFECT if game_guessed >> author_index & 1 else 0)
+                | (ALL_DRAWS if outcome_code == X else 0))
+
+            new_differences = []
+            new_conditions = []
+            for rival_bounds, difference, rival_conditions in zip(rivals_bounds, differences, conditions):
+                rival_index = rival_bounds.rival_index
+                best_differences, _ = rival_bounds.rounds_tables[round_index]
+                difference += author_score - game_scores[rival_index]
+                rival_conditions &= kept_conditions | (
+                    MINUS_AUTHOR_PERFECT if game_guessed >> rival_index & 1 else 0)
+
+                if is_last_game_of_round:
+                    # Bonuses of the round, then start of the next one
+                    difference += best_differences[game_index + 1][rival_conditions]
+                    if round_index + 1 < len(unplayed_rounds):
+                        rival_conditions = rival_bounds.rounds_tables[round_index + 1][1]
+                    best_difference = difference
+                else:
+                    best_difference = difference + best_differences[game_index + 1][rival_conditions]
+
+                if best_difference + rival_bounds.following_rounds_differences[round_index] < 0:
+                    break
+                new_differences.append(difference)
+                new_conditions.append(rival_conditions)
+            else:
+                chosen_outcome_codes[position] = outcome_code
+                if search(position + 1, new_differences, new_conditions):
+                    return True
+
+        return False
+
+    if len(games) == 0:
+        is_found = all(rival_bounds.fixed_difference >= 0 for rival_bounds in rivals_bounds)
+    else:
+        is_found = search(0,
+            [ rival_bounds.fixed_difference for rival_bounds in rivals_bounds ],
+            [ rival_bounds.rounds_tables[0][1] for rival_bounds in rivals_bounds ])
+
+    return bytes(chosen_outcome_codes) if is_found else None
+
+def analyse_contenders(prediction_table, standings_index, ranking_scores, tournament_data, rng):
+    # author --> ContenderStatus; ties for the first place count as first.
+    # Most authors are settled by the bounds on their scores, and by some
+    # sample outcomes (random ones, and the ones each author predicted)
+    # where they finish first, or behind someone
+    authors = sorted(standings_index.authors)
+    unplayed_rounds = get_unplayed_rounds(prediction_table, standings_index, authors, tournament_data)
+    possible_outcome_codes = get_possible_outcome_codes(tournament_data)
+    bonus = tournament_data.bonus_for_perfect_round_prediction
+    base_scores = get_base_scores(standings_index, ranking_scores, authors, unplayed_rounds)
+    packed_standings = get_packed_standings(unplayed_rounds, base_scores, possible_outcome_codes, tournament_data)
+    author_index_bits = packed_standings.author_index_bits
+    author_index_mask = (1 << author_index_bits) - 1
+
+    def get_best_difference_of(plus_author_index, minus_author_index):
+        return get_best_difference(unplayed_rounds, possible_outcome_codes, bonus,
+            base_scores, plus_author_index, minus_author_index)
+
+    max_scores = [ get_best_difference_of(index, None) for index in range(len(authors)) ]
+    min_scores = [ -get_best_difference_of(None, index) for index in range(len(authors)) ]
+    highest_min_score = max(min_scores, default = 0)
+
+    unplayed_games = [
+        (unplayed_round, game_index)
+        for unplayed_round in unplayed_rounds
+        for game_index in range(unplayed_round.unplayed_games_count) ]
+    sample_outcomes = [
+        bytes(
+            max(possible_outcome_codes,
+                key = lambda outcome_code: unplayed_round.unplayed_scores[game_index][outcome_code][author_index])
+            for unplayed_round, game_index in unplayed_games)
+        for author_index in range(len(authors)) ]
+    sample_outcomes.extend(
+        bytes(rng.choices(possible_outcome_codes, k = len(unplayed_games)))
+        for _ in range(1000))
+
+    ever_first_authors = set()
+    never_behind_authors = set(range(len(authors)))
+    for simulation in sample_outcomes:
+        top_values = sorted(get_final_values(packed_standings, simulation), reverse = True)
+        first_authors = set(
+            value & author_index_mask
+            for value in top_values
+            if value >> author_index_bits == top_values[0] >> author_index_bits)
+        ever_first_authors |= first_authors
+        never_behind_authors &= first_authors
+
+    contenders_status = {}
+    for author_index, author in enumerate(authors):
+        if max_scores[author_index] < highest_min_score:
+            # Someone is sure to score more
+            contenders_status[author] = ContenderStatus.ELIMINATED
+
+        elif author_index in never_behind_authors and all(
+                get_best_difference_of(rival_index, author_index) <= 0
+                for rival_index in range(len(authors))
+                if rival_index != author_index and max_scores[rival_index] > min_scores[author_index]):
+            contenders_status[author] = ContenderStatus.CLINCHED
+
+        elif author_index in ever_first_authors:
+            contenders_status[author] = ContenderStatus.ALIVE
+
+        else:
+            # Search outcomes where the author is first against some rivals,
+            # adding as rivals the authors ahead in the outcomes found
+            contenders_status[author] = None
+            rivals_bounds = []
+            while contenders_status[author] is None:
+                simulation = find_first_place_outcomes(unplayed_rounds, possible_outcome_codes,
+                    author_index, rivals_bounds)
+                if simulation is None:
+                    contenders_status[author] = ContenderStatus.ELIMINATED
+                    break
+
+                final_values = get_final_values(packed_standings, simulation)
+                author_score = final_values[author_index] >> author_index_bits
+                rivals_ahead = [
+                    rival_index
+                    for rival_index, value in enumerate(final_values)
+                    if value >> author_index_bits > author_score ]
+                if len(rivals_ahead) == 0:
+                    contenders_status[author] = ContenderStatus.ALIVE
+
+                rivals_bounds.extend(
+                    get_rival_bounds(unplayed_rounds, possible_outcome_codes, bonus,
+                        base_scores, author_index, rival_index)
+                    for rival_index in rivals_ahead)
+
+    return contenders_status
+
+def print_contenders(contenders_status, grand_total_entries):
+    write_out("\n────────────────────────────────\n")
+    write_out("Chi può ancora vincere\n\n")
+
+    # Same order as the final results
+    for author, author_final_score in sorted(grand_total_entries,
+            key = lambda entry: (-entry[1], entry[0].lower())):
+        write_out("%s : %d (%s)\n" % (author, author_final_score, contenders_status[author].value))
+    write_out("────────────────────────────────\n")
+
 ##############################################
 # aux
 
@@ -932,54 +2392,223 @@ def print_all_rankings(sorted_rankings):
             ))
 
 ##############################################
-# main
+# profiling
+
+# Stages of the main, and their helpers called for every line or post
+profiled_functions_names = [
+    "load_aux_data",
+    "load_posts",
+    "parse_posts",
+    "build_prediction_table",  # includes normalise_predictions, a generator
+    "assign_prediction_scores",
+    "calculate_round_entries",
+    "get_rounds_signatures",
+    "patch_round_totals",
+    "assign_ranking_scores",
+    "build_standings_index",
+    "calculate_grand_total_entries",
+    "print_round_results",
+    "print_ranking_scores",
+    "print_final_results",
+    "simulate_chances",
+    "analyse_contenders",
+    "parse_post",
+    "tokenize_line",
+    "get_masters_names_in_line",
+    "get_line_prediction",
+    "get_line_round",
+    "get_line_ranking",
+    "get_username_and_date",
+    ]
+
+def get_profiled_function(function, function_counters, peaks_stack):
+    # `peaks_stack` has the highest traced memory seen so far by each
+    # profiled call in progress: tracemalloc has a single peak, which
+    # every call resets on entry
+    @functools.wraps(function)  # also copies the function attributes
+    def profiled_function(*args, **kwargs):
+        start_memory, peak_memory = tracemalloc.get_traced_memory()
+        if len(peaks_stack) > 0:
+            peaks_stack[-1] = max(peaks_stack[-1], peak_memory)
+        peaks_stack.append(start_memory)
+        tracemalloc.reset_peak()
+        start_time = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            function_counters["seconds"] += time.perf_counter() - start_time
+            function_counters["calls"] += 1
+
+            _, peak_memory = tracemalloc.get_traced_memory()
+            call_peak_memory = max(peaks_stack.pop(), peak_memory)
+            if len(peaks_stack) > 0:
+                peaks_stack[-1] = max(peaks_stack[-1], call_peak_memory)
+            function_counters["allocated_bytes"] += call_peak_memory - start_memory
+            function_counters["peak_bytes"] = max(function_counters["peak_bytes"], call_peak_memory - start_memory)
+
+    return profiled_function
+
+def enable_profiling():
+    # Replace the profiled functions with wrappers updating their counters;
+    # times and memory include the nested calls.
+    # The memory is traced by tracemalloc, for every call: peak_bytes is
+    # the most memory allocated by a single call on top of the memory
+    # in use when it started, allocated_bytes the sum over the calls.
+    # Only the calls in this process are counted (use --jobs 1)
+    tracemalloc.start()
+    profile_counters = {}  # function name --> counters
+    peaks_stack = []
+    for function_name in profiled_functions_names:
+        profile_counters[function_name] = {
+            "calls" : 0, "seconds" : 0.0, "allocated_bytes" : 0, "peak_bytes" : 0 }
+        globals()[function_name] = get_profiled_function(
+            globals()[function_name], profile_counters[function_name], peaks_stack)
+    return profile_counters
+
+def save_profile_report(filename, profile_counters, total_seconds):
+    write_json_atomically(filename, {
+        "total_seconds" : total_seconds,
+        "functions" : {
+            function_name : counters
+            for function_name, counters in profile_counters.items()
+            if counters["calls"] > 0 }
+        })
 
-masters_appellatives, tournament_data = load_aux_data("aux-data.json")
+##############################################
+# main
 
-tournament_text = open("tournament.txt", "rb").read().decode("utf-8", "ignore")
-tournament_post = Post(
-    author = "Official results",
-    date = datetime.datetime(1817, 10, 10),
-    text = tournament_text)
-official_results, _ = extract_predictions(tournament_post, masters_appellatives, tournament_data)
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description = "Calculate the standings of a Fantascacchi tournament")
+    reuse_arguments = argument_parser.add_mutually_exclusive_group()
+    reuse_arguments.add_argument("--incremental", action = "store_true",
+        help = "only parse the posts newer than the last run, reusing the state file")
+    reuse_arguments.add_argument("--memo", action = "store_true",
+        help = "only parse the posts not seen in previous runs, reusing the memo file")
+    argument_parser.add_argument("--state-file", default = "parse-state.json",
+        help = "state file for --incremental (default: %(default)s)")
+    argument_parser.add_argument("--memo-file", default = "posts-memo.json",
+        help = "memo file for --memo (default: %(default)s)")
+    argument_parser.add_argument("--jobs", type = int, default = 1,
+        help = "number of processes parsing the posts (default: %(default)s)")
+    argument_parser.add_argument("--cache", action = "store_true",
+        help = "reuse the parse results if the thread did not change since a previous run")
+    argument_parser.add_argument("--cache-dir", default = "parse-cache",
+        help = "directory for --cache (default: %(default)s)")
+    argument_parser.add_argument("--cache-size", type = int, default = 8,
+        help = "versions of the thread kept by --cache (default: %(default)s)")
+    argument_parser.add_argument("--chances", type = int, nargs = "?", const = 100000,
+        help = "simulate the unplayed games this many times, and print the chances "
+            "of every author to finish first or on the podium (default: %(const)s); "
+            "the outcomes are drawn with the weights of outcome_probabilities in aux-data.json, "
+            "rounded to multiples of 1/252")
+    argument_parser.add_argument("--contenders", action = "store_true",
+        help = "tell who has clinched the first place, who can still get it and who cannot, "
+            "whatever the outcomes of the unplayed games")
+    argument_parser.add_argument("--seed", type = int, default = 1817,
+        help = "random seed for --chances and --contenders (default: %(default)s)")
+    argument_parser.add_argument("--profile", nargs = "?", const = "profile.json",
+        help = "write time, calls and memory allocated (traced with tracemalloc) of every stage to a JSON file (default: %(const)s)")
+    argument_parser.add_argument("--pstats",
+        help = "also run under cProfile, writing its statistics to this file")
+    arguments = argument_parser.parse_args()
+
+    if arguments.profile:
+        profile_counters = enable_profiling()
+        profile_start_time = time.perf_counter()
+
+    if arguments.pstats:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    masters_appellatives, tournament_data = load_aux_data("aux-data.json")
+
+    tournament_text = open("tournament.txt", "rb").read().decode("utf-8", "ignore")
+    tournament_post = Post(
+        author = "Official results",
+        date = datetime.datetime(1817, 10, 10),
+        text = tournament_text)
+    official_results, _ = extract_predictions(tournament_post, masters_appellatives, tournament_data)
+
+    thread_cache_hit = None
+    if arguments.cache:
+        thread_cache_key = get_thread_cache_key("thread.html", masters_appellatives, tournament_data)
+        thread_cache_hit = load_thread_cache(arguments.cache_dir, thread_cache_key)
+
+    if thread_cache_hit is not None:
+        posts, posts_results = thread_cache_hit
+    else:
+        posts = load_posts("thread.html", tournament_data.should_ignore_post, tournament_data.team_names)
+
+        if arguments.incremental:
+            parse_state = load_parse_state(arguments.state_file,
+                get_parse_fingerprint(masters_appellatives, tournament_data))
+            posts_results, parse_state = parse_posts_incrementally(
+                posts, masters_appellatives, tournament_data, parse_state, arguments.jobs)
+        elif arguments.memo:
+            posts_results, posts_memo = parse_posts_memoized(
+                posts, masters_appellatives, tournament_data,
+                load_posts_memo(arguments.memo_file), arguments.jobs)
+            save_posts_memo(arguments.memo_file, posts_memo)
+        else:
+            posts_results = parse_posts(posts, masters_appellatives, tournament_data, arguments.jobs)
 
-posts = load_posts("thread.html", tournament_data.should_ignore_post, tournament_data.team_names)
-posts.extend(tournament_data.post_corrections)
+        if arguments.cache:
+            save_thread_cache(arguments.cache_dir, thread_cache_key,
+                posts, posts_results, arguments.cache_size)
 
-all_predictions = []
-all_predictions.extend(official_results)
+    posts.extend(tournament_data.post_corrections)
+    posts_results.extend(parse_posts(tournament_data.post_corrections, masters_appellatives, tournament_data))
 
-all_rankings = []
+    for post, (_, _, suspect_reasons) in zip(posts, posts_results):
+        report_suspect_post(post, suspect_reasons, tournament_data)
 
-for post in posts:
-    post_predictions, post_ranking = extract_predictions(post, masters_appellatives, tournament_data)
+    all_rankings = [
+        post_ranking
+        for _, post_ranking, _ in posts_results
+        if post_ranking is not None ]
 
-    #write_err("%s : %s\n" % (post.text, post_predictions))
+    prediction_table = build_prediction_table(normalise_predictions(
+        official_results,
+        (prediction
+            for post_predictions, _, _ in posts_results
+            for prediction in post_predictions) ))
 
-    all_predictions.extend(post_predictions)
+    if arguments.incremental and thread_cache_hit is None:
+        prediction_table, round_entries, frozen_rounds = calculate_round_entries_memoized(
+            prediction_table, tournament_data, parse_state.frozen_rounds)
+        save_parse_state(arguments.state_file, parse_state._replace(frozen_rounds = frozen_rounds))
+    else:
+        prediction_table = assign_prediction_scores(prediction_table,
+                tournament_data.scoring_matrix, tournament_data.masters_scoring_bonuses)
 
-    if post_ranking is not None:
-        all_rankings.append(post_ranking)
+        round_entries = calculate_round_entries(prediction_table, tournament_data)
 
+    ranking_scores = assign_ranking_scores(all_rankings, tournament_data)
+    standings_index = build_standings_index(round_entries)
+    detect_abandoning_authors(standings_index)
+    grand_total_entries = calculate_grand_total_entries(standings_index, ranking_scores)
 
-all_predictions = repair_turns(all_predictions)
-all_predictions = remove_duplicates(all_predictions)
+    sorted_rankings = sorted(all_rankings, key = lambda ranking: (ranking.author.lower()))
 
-if tournament_data.scoring_system  != "3_2_1_0":
-    scoring_function = assign_prediction_scores
-else:
-    scoring_function = assign_prediction_scores_3210
+    print_round_results(standings_index)
+    print_ranking_scores(ranking_scores)
+    print_final_results(grand_total_entries)
 
-all_predictions = scoring_function(all_predictions,
-        tournament_data.scoring_system, tournament_data.masters_scoring_bonuses)
+    if arguments.chances:
+        chances = simulate_chances(prediction_table, standings_index, ranking_scores,
+            tournament_data, arguments.chances, random.Random(arguments.seed))
+        print_chances(chances, arguments.chances)
 
-round_entries = calculate_round_entries(all_predictions, tournament_data)
-ranking_scores = assign_ranking_scores(all_rankings, tournament_data)
-detect_abandoning_authors(round_entries)
-grand_total_entries = calculate_grand_total_entries(round_entries, ranking_scores)
+    if arguments.contenders:
+        contenders_status = analyse_contenders(prediction_table, standings_index, ranking_scores,
+            tournament_data, random.Random(arguments.seed))
+        print_contenders(contenders_status, grand_total_entries)
 
-sorted_rankings = sorted(all_rankings, key = lambda ranking: (ranking.author.lower()))
+    if arguments.pstats:
+        profiler.disable()
+        profiler.dump_stats(arguments.pstats)
 
-print_round_results(round_entries)
-print_ranking_scores(ranking_scores)
-print_final_results(grand_total_entries)
+    if arguments.profile:
+        save_profile_report(arguments.profile, profile_counters,
+            time.perf_counter() - profile_start_time)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# Tests of fetch-thread.py against a local stand-in of the blog,
+# serving the comment pages in tests/fixtures/comment-pages.
+# Run with: python -m unittest discover tests
+
+import hashlib
+import http.server
+import importlib.util
+import os
+import re
+import threading
+import time
+import unittest
+import urllib.error
+
+tests_directory = os.path.dirname(os.path.abspath(__file__))
+script_directory = os.path.dirname(tests_directory)
+pages_directory = os.path.join(tests_directory, "fixtures", "comment-pages")
+
+fetch_thread_spec = importlib.util.spec_from_file_location(
+    "fetch_thread", os.path.join(script_directory, "fetch-thread.py"))
+fetch_thread = importlib.util.module_from_spec(fetch_thread_spec)
+fetch_thread_spec.loader.exec_module(fetch_thread)
+
+pages_count = 3
+
+def read_page(page_number):
+    with open(os.path.join(pages_directory, "comment-page-{}.html".format(page_number)), "rb") as file:
+        return file.read()
+
+######################################
+
+class BlogRequestHandler(http.server.BaseHTTPRequestHandler):
+    # The thread URL shows the newest page, as WordPress does;
+    # the pages have an ETag and are kept alive
+    protocol_version = "HTTP/1.1"
+
+    def handle(self):
+        with self.server.lock:
+            self.server.connections_count += 1
+        super().handle()
+
+    def do_GET(self):
+        path = self.path.rstrip("/")
+        if path == "/fantascacchi/thread":
+            page_number = pages_count
+        elif path.startswith("/fantascacchi/thread/comment-page-"):
+            page_number = int(path.rsplit("-", 1)[1])
+        else:
+            self.send_error(404)
+            return
+
+        with self.server.lock:
+            self.server.requested_pages.append(page_number)
+            is_slow = self.server.slow_requests_count > 0
+            self.server.slow_requests_count -= 1
+
+        if is_slow:
+            time.sleep(1)
+
+        body = read_page(page_number)
+        if self.server.without_current_page:
+            body = re.sub(rb"<span[^>]*current[^>]*>\d+</span>", b"", body)
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+        if self.server.always_not_modified or self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *arguments):
+        pass
+
+class FetchThreadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), BlogRequestHandler)
+        self.server.lock = threading.Lock()
+        self.server.connections_count = 0
+        self.server.requested_pages = []
+        self.server.always_not_modified = False
+        self.server.without_current_page = False
+        self.server.slow_requests_count = 0
+        self.server.daemon_threads = True
+        threading.Thread(target = self.server.serve_forever, daemon = True).start()
+        self.url = "http://127.0.0.1:{}/fantascacchi/thread/".format(self.server.server_address[1])
+        self.connection_pool = fetch_thread.ConnectionPool(2, timeout = 0.5)
+
+    def tearDown(self):
+        self.connection_pool.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_all_pages_in_order(self):
+        # The newest page is the current one: it is not linked from itself
+        pages = fetch_thread.fetch_thread(self.url, self.connection_pool)
+        self.assertEqual(pages, [ read_page(page_number) for page_number in range(1, pages_count + 1) ])
+        self.assertEqual(sorted(self.server.requested_pages), [ 1, 2, pages_count ])
+
+    def test_without_current_page(self):
+        # The shown page is taken as the one after the last link
+        self.server.without_current_page = True
+        pages = fetch_thread.fetch_thread(self.url, self.connection_pool)
+        self.assertEqual(len(pages), pages_count)
+        self.assertEqual(sorted(self.server.requested_pages), [ 1, 2, pages_count ])
+
+    def test_timeout(self):
+        # The request is sent again on a new connection
+        self.server.slow_requests_count = 1
+        pages = fetch_thread.fetch_thread(self.url, self.connection_pool)
+        self.assertEqual(pages, [ read_page(page_number) for page_number in range(1, pages_count + 1) ])
+
+    def test_connections_are_reused(self):
+        # The download threads, and so their connections, live as long as the pool
+        pages_cache = {}
+        for _ in range(20):
+            fetch_thread.fetch_thread(self.url, self.connection_pool, pages_cache)
+        self.assertLessEqual(len(self.connection_pool.all_connections), 2)
+        self.assertLessEqual(self.server.connections_count, 2)
+
+    def test_not_modified_pages(self):
+        pages_cache = {}
+        expected_pages = fetch_thread.fetch_thread(self.url, self.connection_pool, pages_cache)
+        self.assertEqual(fetch_thread.fetch_thread(self.url, self.connection_pool, pages_cache), expected_pages)
+
+    def test_not_modified_without_cached_page(self):
+        self.server.always_not_modified = True
+        with self.assertRaises(urllib.error.HTTPError):
+            fetch_thread.fetch_thread(self.url, self.connection_pool)
+
+if __name__ == "__main__":
+    unittest.main()
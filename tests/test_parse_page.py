@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+
+# Regression tests of parse-page.py, run as the command line tool
+# on the fixture tournaments in tests/fixtures, and of some of its
+# functions on the thread and tournament of the repository.
+# Run with: python -m unittest discover tests
+
+import concurrent.futures
+import importlib.util
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+import unittest.mock
+
+tests_directory = os.path.dirname(os.path.abspath(__file__))
+script_directory = os.path.dirname(tests_directory)
+fixtures_directory = os.path.join(tests_directory, "fixtures")
+
+# parse-page.py is not importable by name
+parse_page_spec = importlib.util.spec_from_file_location(
+    "parse_page", os.path.join(script_directory, "parse-page.py"))
+parse_page = importlib.util.module_from_spec(parse_page_spec)
+parse_page_spec.loader.exec_module(parse_page)
+
+def run_parse_page(directory, *arguments, with_warnings = False):
+    # Returns the standard output, and also the warnings if `with_warnings`.
+    # Some outputs follow the iteration order of sets of names,
+    # which only repeats with the same hash seed
+    completed_process = subprocess.run(
+        [ sys.executable, os.path.join(script_directory, "parse-page.py") ] + list(arguments),
+        cwd = directory, capture_output = True, check = True,
+        env = dict(os.environ, PYTHONHASHSEED = "0"))
+    if with_warnings:
+        return completed_process.stdout.decode("utf-8"), completed_process.stderr.decode("utf-8")
+    return completed_process.stdout.decode("utf-8")
+
+def copy_fixture(fixture_name, directory, extra_pages = ()):
+    # The fixture files, with the pages in `extra_pages` appended to thread.html
+    fixture_directory = os.path.join(fixtures_directory, fixture_name)
+    for filename in ("thread.html", "tournament.txt", "aux-data.json"):
+        shutil.copy(os.path.join(fixture_directory, filename), directory)
+
+    with open(os.path.join(directory, "thread.html"), "ab") as thread_file:
+        for page_filename in extra_pages:
+            with open(os.path.join(fixture_directory, page_filename), "rb") as page_file:
+                thread_file.write(page_file.read())
+
+def replace_in_file(directory, filename, old_text, new_text):
+    filename = os.path.join(directory, filename)
+    with open(filename, "r", encoding = "utf-8") as file:
+        text = file.read()
+    assert text.count(old_text) == 1, old_text
+    with open(filename, "w", encoding = "utf-8") as file:
+        file.write(text.replace(old_text, new_text))
+
+def duplicate_first_post(directory):
+    # The same comment twice in a row, as after a double submission
+    thread_filename = os.path.join(directory, "thread.html")
+    with open(thread_filename, "r", encoding = "utf-8") as thread_file:
+        thread_text = thread_file.read()
+    first_post_start = thread_text.index("<li ")
+    first_post_end = thread_text.index("</li>", first_post_start) + len("</li>\n")
+    with open(thread_filename, "w", encoding = "utf-8") as thread_file:
+        thread_file.write(thread_text[:first_post_end]
+            + thread_text[first_post_start:first_post_end] + thread_text[first_post_end:])
+
+######################################
+
+class UnscheduledGameTest(unittest.TestCase):
+    # Predictions of games which are not in tournament.txt
+    # (here with the colours swapped) are reported, but do not make
+    # a round, whether they have no round or a round which does not exist
+
+    def get_outputs(self, extra_pages, *arguments):
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("unscheduled-game", directory, extra_pages)
+            # Twice, for the rounds frozen by --incremental
+            return [ run_parse_page(directory, *arguments) for _ in range(2) ]
+
+    def test_same_standings(self):
+        expected_output, _ = self.get_outputs(())
+        self.assertNotIn("turno 6", expected_output.lower())
+
+        for arguments in ([], [ "--incremental" ]):
+            with self.subTest(arguments = arguments):
+                for output in self.get_outputs([ "unscheduled-posts.html" ], *arguments):
+                    self.assertEqual(output, expected_output)
+
+class ReuseModesTest(unittest.TestCase):
+    # The modes reusing the results of previous runs give the same
+    # standings as a full parse, on their first run, when nothing
+    # changed, and after a post or an official result changed
+
+    changes = [
+        # A prediction edited in an old post
+        ("thread.html", "Gragratuez — Zonaov 1-0", "Gragratuez — Zonaov 0-1"),
+        # The official result of a finished round corrected
+        ("tournament.txt", "Gratusaer Gragratuez – Batuo Musteov 2", "Gratusaer Gragratuez – Batuo Musteov X"),
+        # A game of an unplayed round played
+        ("tournament.txt", "Batuo Musteov – Nasaer Lituani\n", "Batuo Musteov – Nasaer Lituani 1\n"),
+        ]
+
+    def check_same_outputs(self, *arguments):
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("synthetic", directory)
+            previous_output = None
+            for change in [ None ] + self.changes:
+                if change is not None:
+                    replace_in_file(directory, *change)
+
+                expected_output = run_parse_page(directory)
+                self.assertNotEqual(expected_output, previous_output)
+                previous_output = expected_output
+
+                for _ in range(2):
+                    self.assertEqual(run_parse_page(directory, *arguments), expected_output)
+
+    def test_memo(self):
+        self.check_same_outputs("--memo")
+
+    def test_incremental(self):
+        self.check_same_outputs("--incremental")
+
+    def test_incremental_changed_result(self):
+        # Only the games whose official result changed are scored again,
+        # in the rounds frozen by the previous run
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("synthetic", directory)
+            for _ in range(2):
+                run_parse_page(directory, "--incremental")
+            replace_in_file(directory, *self.changes[1])
+            output, warnings = run_parse_page(directory, "--incremental", with_warnings = True)
+            self.assertIn("Scored 0 rounds out of 10, and 1 changed games", warnings)
+            self.assertEqual(output, run_parse_page(directory))
+
+    def test_jobs(self):
+        # The posts are parsed in other processes, in chunks,
+        # and the results put back in the order of the posts
+        self.check_same_outputs("--jobs", "3")
+        self.check_same_outputs("--jobs", "2", "--memo")
+
+        # Also the suspect posts are reported in the order of the thread
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("synthetic", directory)
+            self.assertEqual(run_parse_page(directory, "--jobs", "3", with_warnings = True),
+                run_parse_page(directory, with_warnings = True))
+
+    def test_cache(self):
+        self.check_same_outputs("--cache")
+        self.check_same_outputs("--cache", "--incremental")
+
+    def test_cache_scoring_change(self):
+        # Only the scoring changed: the cached parse results are reused
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("synthetic", directory)
+            run_parse_page(directory, "--cache")
+            replace_in_file(directory, "aux-data.json", '"scoring_system": "3_1_4"', '"scoring_system": "2_1_3"')
+            self.assertEqual(run_parse_page(directory, "--cache"), run_parse_page(directory))
+
+    def test_cache_eviction(self):
+        # Three versions of the thread, run as A B A C with a cache of two:
+        # B is the least recently used one when C comes
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("synthetic", directory)
+            with open(os.path.join(directory, "thread.html"), "r", encoding = "utf-8") as file:
+                thread_a = file.read()
+            _, old_text, new_text = self.changes[0]
+            thread_b = thread_a.replace(old_text, new_text)
+            thread_c = thread_a.replace(old_text, old_text.replace("1-0", "X"))
+
+            cache_keys_per_run = []
+            for thread_text in (thread_a, thread_b, thread_a, thread_c):
+                with open(os.path.join(directory, "thread.html"), "w", encoding = "utf-8") as file:
+                    file.write(thread_text)
+                expected_output = run_parse_page(directory)
+                self.assertEqual(run_parse_page(directory, "--cache", "--cache-size", "2"), expected_output)
+                cache_keys_per_run.append(set(os.listdir(os.path.join(directory, "parse-cache"))))
+
+            key_a, = cache_keys_per_run[0]
+            key_b, = cache_keys_per_run[1] - { key_a }
+            self.assertEqual(cache_keys_per_run[2], { key_a, key_b })
+            self.assertEqual(len(cache_keys_per_run[3]), 2)
+            self.assertIn(key_a, cache_keys_per_run[3])
+            self.assertNotIn(key_b, cache_keys_per_run[3])
+
+    def test_duplicated_post(self):
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("synthetic", directory)
+            duplicate_first_post(directory)
+            expected_output = run_parse_page(directory)
+            for _ in range(2):
+                self.assertEqual(run_parse_page(directory, "--memo"), expected_output)
+
+class CustomScoringSystemTest(unittest.TestCase):
+    # A scoring system defined in aux-data.json as the built-in 3_1_4
+    # gives the same standings
+
+    def test_same_as_builtin(self):
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("synthetic", directory)
+            arguments = [ "--contenders", "--chances", "2000" ]
+            expected_output = run_parse_page(directory, *arguments)
+            shutil.copy(os.path.join(fixtures_directory, "synthetic", "aux-data-custom-scoring.json"),
+                os.path.join(directory, "aux-data.json"))
+            self.assertEqual(run_parse_page(directory, *arguments), expected_output)
+
+class ContendersTest(unittest.TestCase):
+    # The statuses of --contenders are the ones found by playing
+    # every combination of outcomes of the unplayed games
+
+    fifth_round_results = [
+        ("Mugrakeo Libasteski – Mudoer Rikedoov", "1"),
+        ("Posaa Lisaani – Likemua Dostetuski", "1") ]
+
+    def get_final_standings(self, output):
+        # author --> final score
+        final_lines = output.split("CLASSIFICA FINALE\n")[1].split("────")[0].splitlines()
+        return { author : int(score) for author, score in (line.split(" : ") for line in final_lines) }
+
+    def get_contenders(self, output):
+        # author --> status
+        contenders_lines = output.split("Chi può ancora vincere\n\n")[1].split("────")[0].splitlines()
+        return {
+            line.split(" : ")[0] : line.split("(")[1].rstrip(")")
+            for line in contenders_lines }
+
+    def get_brute_force_contenders(self, directory):
+        with open(os.path.join(directory, "tournament.txt"), "r", encoding = "utf-8") as file:
+            tournament_lines = file.read().split("\n")
+        unplayed_lines_indices = [
+            index
+            for index, line in enumerate(tournament_lines)
+            if " – " in line and line.split()[-1] not in ("1", "X", "2") ]
+
+        def get_first_authors(outcomes):
+            with tempfile.TemporaryDirectory() as outcomes_directory:
+                for filename in ("thread.html", "aux-data.json"):
+                    shutil.copy(os.path.join(directory, filename), outcomes_directory)
+                played_lines = list(tournament_lines)
+                for index, outcome in zip(unplayed_lines_indices, outcomes):
+                    played_lines[index] += " " + outcome
+                with open(os.path.join(outcomes_directory, "tournament.txt"), "w", encoding = "utf-8") as file:
+                    file.write("\n".join(played_lines))
+                final_standings = self.get_final_standings(run_parse_page(outcomes_directory))
+            best_score = max(final_standings.values())
+            return { author for author, score in final_standings.items() if score == best_score }
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers = os.cpu_count()) as executor:
+            first_authors_per_outcomes = list(executor.map(get_first_authors,
+                itertools.product("1X2", repeat = len(unplayed_lines_indices))))
+
+        authors = self.get_final_standings(run_parse_page(directory)).keys()
+        return {
+            author :
+                parse_page.ContenderStatus.CLINCHED.value
+                if all(author in first_authors for first_authors in first_authors_per_outcomes)
+                else parse_page.ContenderStatus.ALIVE.value
+                if any(author in first_authors for first_authors in first_authors_per_outcomes)
+                else parse_page.ContenderStatus.ELIMINATED.value
+            for author in authors }
+
+    def test_brute_force(self):
+        all_statuses = set()
+        # Four unplayed games; then the two left after the fifth round,
+        # when the leader has clinched the first place
+        for played_results in ([], self.fifth_round_results):
+            with self.subTest(played_results = played_results):
+                with tempfile.TemporaryDirectory() as directory:
+                    copy_fixture("contenders", directory)
+                    for game_line, outcome in played_results:
+                        replace_in_file(directory, "tournament.txt", game_line + "\n", game_line + " " + outcome + "\n")
+
+                    contenders = self.get_contenders(run_parse_page(directory, "--contenders"))
+                    self.assertEqual(contenders, self.get_brute_force_contenders(directory))
+                    all_statuses.update(contenders.values())
+
+        # The fixture covers every status
+        self.assertEqual(all_statuses, { status.value for status in parse_page.ContenderStatus })
+
+    def get_chances(self, output):
+        # author --> percentage of the simulations finishing first
+        chances_lines = output.split("simulazioni)\n\n")[1].split("────")[0].splitlines()
+        return {
+            line.split(" : ")[0] : float(line.split(" : ")[1].split("%")[0])
+            for line in chances_lines }
+
+    def test_chances(self):
+        # With the same seed, the same simulations: the author who has
+        # clinched the first place always wins, the eliminated ones never
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("contenders", directory)
+            for game_line, outcome in self.fifth_round_results:
+                replace_in_file(directory, "tournament.txt", game_line + "\n", game_line + " " + outcome + "\n")
+
+            output = run_parse_page(directory, "--chances", "20000", "--contenders", "--seed", "7")
+            self.assertEqual(run_parse_page(directory, "--chances", "20000", "--contenders", "--seed", "7"), output)
+
+        chances = self.get_chances(output)
+        contenders = self.get_contenders(output)
+        self.assertIn(parse_page.ContenderStatus.CLINCHED.value, contenders.values())
+        for author, status in contenders.items():
+            if status == parse_page.ContenderStatus.CLINCHED.value:
+                self.assertEqual(chances[author], 100.0)
+            elif status == parse_page.ContenderStatus.ELIMINATED.value:
+                self.assertEqual(chances[author], 0.0)
+
+class ProfileTest(unittest.TestCase):
+
+    def test_profile_report(self):
+        # The report does not change the standings
+        with tempfile.TemporaryDirectory() as directory:
+            copy_fixture("synthetic", directory)
+            self.assertEqual(run_parse_page(directory, "--profile"), run_parse_page(directory))
+            with open(os.path.join(directory, "profile.json"), "r", encoding = "utf-8") as file:
+                profile_report = json.load(file)
+
+        for function_name in ("load_posts", "parse_post", "get_line_prediction"):
+            with self.subTest(function_name = function_name):
+                counters = profile_report["functions"][function_name]
+                self.assertGreater(counters["calls"], 0)
+                self.assertGreater(counters["peak_bytes"], 0)
+                self.assertGreaterEqual(counters["allocated_bytes"], counters["peak_bytes"])
+        # The memory of the nested calls is part of the memory of the callers
+        self.assertGreaterEqual(profile_report["functions"]["parse_posts"]["peak_bytes"],
+            profile_report["functions"]["parse_post"]["peak_bytes"])
+
+class CommentsParserTest(unittest.TestCase):
+    # A <div> left open in a comment ends with the comment,
+    # as the texts found by BeautifulSoup did
+
+    def get_texts(self, html_text):
+        comments_parser = parse_page.CommentsParser()
+        comments_parser.feed(html_text)
+        comments_parser.close()
+        return comments_parser.info_com_texts
+
+    def test_unclosed_div(self):
+        self.assertEqual(self.get_texts(
+            '<li class="comment byuser comment-author-a"><div class="info_com">A<div>B</li>'
+            '<li class="comment byuser comment-author-c"><div class="info_com">C</div></li>'),
+            [ "AB", "C" ])
+
+    def test_unclosed_comment(self):
+        self.assertEqual(self.get_texts(
+            '<li class="comment byuser comment-author-a"><div class="info_com">A<div>B'
+            '<li class="comment byuser comment-author-c"><div class="info_com">C</div></li>'),
+            [ "AB", "C" ])
+
+    def test_list_in_comment(self):
+        self.assertEqual(self.get_texts(
+            '<li class="comment byuser comment-author-a"><div class="info_com">A<ul><li>B</li></ul>C</div></li>'),
+            [ "ABC" ])
+
+    def test_truncated_thread(self):
+        with unittest.mock.patch.object(parse_page, "write_err") as write_err:
+            self.assertEqual(self.get_texts(
+                '<li class="comment byuser comment-author-a"><div class="info_com">A</div></li>'
+                '<li class="comment byuser comment-author-c"><div class="info_com">C<div>D'),
+                [ "A" ])
+        write_err.assert_called_once()
+
+    def test_fixture_posts(self):
+        posts = parse_page.load_posts(os.path.join(fixtures_directory, "unclosed-div", "thread.html"),
+            lambda post: False, {})
+        self.assertEqual([ post.author for post in posts ], [ "Alfa", "Beta" ])
+        self.assertIn("Nakamura – Wei Yi X", posts[0].text)
+        self.assertIn("Nakamura – Wei Yi 1", posts[1].text)
+
+class LineRoundTest(unittest.TestCase):
+
+    def get_round(self, line):
+        return parse_page.get_line_round(parse_page.LineTokens(
+            folded_line = parse_page.fold_line(line), masters_names = []))
+
+    def test_rounds(self):
+        for line, expected_round in [
+                ("Turno 1", 1),
+                ("Round 30", 30),
+                ("sedicesimo turno", 16),
+                ("Turno XVI", 16),
+                # Past the sixteenth round
+                ("diciassettesimo turno", 17),
+                ("ventesimo turno", 20),
+                ("Ventitreesimo round", 23),
+                ("trentesimo turno", 30),
+                ("Turno XVII", 17),
+                ("XXIII turno", 23),
+                ("Turno XXX", 30),
+                # Cyrillic "Х", folded to the Roman X
+                ("Turno Х", 10),
+                ("XХ turno", 20),
+                ("Giri – Caruana х", None),
+                ]:
+            with self.subTest(line = line):
+                self.assertEqual(self.get_round(line), expected_round)
+
+class OutcomeProbabilitiesTest(unittest.TestCase):
+    # The weights of the outcomes of the unplayed games, in aux-data.json
+
+    def load_outcome_probabilities(self, **aux_data_changes):
+        with open(os.path.join(fixtures_directory, "unscheduled-game", "aux-data.json"), encoding = "utf-8") as file:
+            aux_data = dict(json.load(file), **aux_data_changes)
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "aux-data.json")
+            with open(filename, "w", encoding = "utf-8") as file:
+                json.dump(aux_data, file)
+            _, tournament_data = parse_page.load_aux_data(filename)
+        return tournament_data.outcome_probabilities
+
+    def test_defaults(self):
+        self.assertEqual(self.load_outcome_probabilities(),
+            { "1" : 1, "X" : 1, "2" : 1 })
+        # No points for 1, X and 2 in the tiebreaks scoring
+        self.assertEqual(self.load_outcome_probabilities(scoring_system = "3_2_1_0"),
+            { "1R" : 1, "2R" : 1, "1A" : 1, "2A" : 1 })
+
+    def test_invalid_weights(self):
+        for outcome_probabilities in ({ "1" : 1, "0" : 1 }, { "1" : 1, "X" : -1 }, { "1" : 0, "X" : 0, "2" : 0 }, {}):
+            with self.subTest(outcome_probabilities = outcome_probabilities):
+                with self.assertRaises(AssertionError):
+                    self.load_outcome_probabilities(outcome_probabilities = outcome_probabilities)
+
+class OutcomesRegexTest(unittest.TestCase):
+    # The single regex of get_line_prediction finds the same outcome as
+    # trying the regexps of possible_outcomes one by one, in order
+
+    def get_sequential_outcome(self, folded_line):
+        for outcome_re, outcome in parse_page.get_line_prediction.possible_outcomes:
+            if outcome_re.search(folded_line):
+                return outcome
+        return None
+
+    def get_fused_outcome(self, folded_line):
+        outcome_match = parse_page.get_line_prediction.outcomes_re.match(folded_line)
+        if outcome_match is None:
+            return None
+        return parse_page.get_line_prediction.outcomes_by_group[outcome_match.lastgroup]
+
+    def get_lines(self):
+        # Every line of the files, both raw and as the text of the posts
+        directories = [ script_directory ] + [
+            os.path.join(fixtures_directory, fixture_name) for fixture_name in os.listdir(fixtures_directory) ]
+        for directory in directories:
+            for filename in os.listdir(directory):
+                if filename.endswith((".html", ".txt")):
+                    with open(os.path.join(directory, filename), encoding = "utf-8", errors = "ignore") as file:
+                        yield from file.read().split("\n")
+                if filename.endswith(".html"):
+                    for post in parse_page.load_posts(os.path.join(directory, filename), lambda post: False, {}):
+                        yield from post.text.split("\n")
+
+        # Lines with several outcomes, or only near the end
+        yield from [ "Giri – Caruana 1/2 1-0", "Giri - Caruana 0 - 1 ½", "Giri Caruana х",
+            "Giri Caruana patta 2", "Giri Caruana 1R 0,5", "@@@ 1", "", "x", "1", " 2 " ]
+
+    def test_same_outcome(self):
+        lines_count = 0
+        for line in self.get_lines():
+            folded_line = parse_page.fold_line(line)
+            self.assertEqual(self.get_fused_outcome(folded_line), self.get_sequential_outcome(folded_line),
+                repr(folded_line))
+            lines_count += 1
+        self.assertGreater(lines_count, 1000)
+
+if __name__ == "__main__":
+    unittest.main()
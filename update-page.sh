@@ -1 +1 @@
-wget https://www.scacchierando.it/fantascacchi/fantacandidati-2026/ -O thread.html
+python3 fetch-thread.py https://www.scacchierando.it/fantascacchi/fantacandidati-2026/ --output thread.html
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+# Keep the standings up to date during a round:
+# poll the thread (all its comment pages), and whenever it
+# (or tournament.txt, or aux-data.json) changes,
+# run parse-page.py and replace res.txt and err.txt
+
+import argparse
+import hashlib
+import http.client
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+
+# fetch-thread.py is not importable by name
+fetch_thread_spec = importlib.util.spec_from_file_location(
+    "fetch_thread", os.path.join(script_directory, "fetch-thread.py"))
+fetch_thread = importlib.util.module_from_spec(fetch_thread_spec)
+fetch_thread_spec.loader.exec_module(fetch_thread)
+
+######################################
+
+def write_err(string):
+    sys.stderr.buffer.write(string.encode("utf-8"))
+    sys.stderr.flush()
+
+def write_atomically(filename, data):
+    # Readers of the file never see it half written
+    temporary_filename = filename + ".tmp"
+    with open(temporary_filename, "wb") as file:
+        file.write(data)
+    os.replace(temporary_filename, filename)
+
+######################################
+
+def get_file_signature(filename):
+    try:
+        file_stat = os.stat(filename)
+    except OSError:
+        return None
+    return (file_stat.st_mtime_ns, file_stat.st_size)
+
+######################################
+
+class ThreadWatcher:
+    def __init__(self, arguments):
+        self.arguments = arguments
+        # Validators and bodies of the thread pages,
+        # for the conditional requests
+        self.pages_cache = {}
+        self.connection_pool = fetch_thread.ConnectionPool(arguments.connections)
+        self.thread_hash = None
+        self.local_file_signature = None
+        self.inputs_signatures = None
+
+    def update_thread(self):
+        # Returns True if thread.html changed
+        if self.arguments.file is not None:
+            local_file_signature = get_file_signature(self.arguments.file)
+            if local_file_signature == self.local_file_signature:
+                return False
+            self.local_file_signature = local_file_signature
+            with open(self.arguments.file, "rb") as file:
+                data = file.read()
+        else:
+            pages = fetch_thread.fetch_thread(self.arguments.url, self.connection_pool, self.pages_cache)
+            data = b"".join(pages)
+
+        # Unchanged pages are not downloaded again (304), but may still be
+        # in a thread with new pages; this also catches servers
+        # ignoring the conditional requests
+        thread_hash = hashlib.sha1(data).hexdigest()
+        if thread_hash == self.thread_hash:
+            return False
+        self.thread_hash = thread_hash
+
+        if os.path.abspath(self.arguments.file or "") != os.path.abspath("thread.html"):
+            write_atomically("thread.html", data)
+        return True
+
+    def update_inputs(self):
+        # Returns True if tournament.txt or aux-data.json changed
+        inputs_signatures = [
+            get_file_signature(filename)
+            for filename in ("tournament.txt", "aux-data.json") ]
+        if inputs_signatures == self.inputs_signatures:
+            return False
+        self.inputs_signatures = inputs_signatures
+        return True
+
+    def calculate_standings(self):
+        command = [ sys.executable, os.path.join(script_directory, "parse-page.py") ]
+        command.extend(self.arguments.parse_page_arguments)
+
+        with open(self.arguments.output + ".tmp", "wb") as output_file, \
+                open(self.arguments.errors + ".tmp", "wb") as errors_file:
+            completed_process = subprocess.run(command, stdout = output_file, stderr = errors_file)
+
+        if completed_process.returncode != 0:
+            # Keep the last good standings
+            write_err("parse-page.py failed, see {}.tmp\n".format(self.arguments.errors))
+            return
+
+        os.replace(self.arguments.output + ".tmp", self.arguments.output)
+        os.replace(self.arguments.errors + ".tmp", self.arguments.errors)
+        write_err("{}: standings updated\n".format(time.strftime("%H:%M:%S")))
+
+    def watch(self):
+        while True:
+            try:
+                # Both always checked, to record the new signatures
+                is_thread_changed = self.update_thread()
+                are_inputs_changed = self.update_inputs()
+                if is_thread_changed or are_inputs_changed:
+                    self.calculate_standings()
+            # A malformed or truncated response is not an OSError:
+            # the next poll retries, as for a network error
+            except (OSError, urllib.error.URLError, http.client.HTTPException) as error:
+                write_err("{}: {}\n".format(time.strftime("%H:%M:%S"), error))
+
+            time.sleep(self.arguments.interval)
+
+######################################
+# main
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description = "Recalculate the standings whenever the thread changes",
+        epilog = "Arguments after -- are passed to parse-page.py")
+    source_arguments = argument_parser.add_mutually_exclusive_group()
+    source_arguments.add_argument("--url",
+        default = "https://www.scacchierando.it/fantascacchi/fantacandidati-2026/",
+        help = "thread to poll (default: %(default)s)")
+    source_arguments.add_argument("--file",
+        help = "poll this local file instead of the URL")
+    argument_parser.add_argument("--interval", type = float, default = 30,
+        help = "seconds between two checks (default: %(default)s)")
+    argument_parser.add_argument("--connections", type = int, default = 4,
+        help = "concurrent downloads of the comment pages (default: %(default)s)")
+    argument_parser.add_argument("--output", default = "res.txt",
+        help = "standings file (default: %(default)s)")
+    argument_parser.add_argument("--errors", default = "err.txt",
+        help = "warnings file (default: %(default)s)")
+    argument_parser.add_argument("parse_page_arguments", nargs = "*",
+        default = [ "--incremental" ],
+        help = "arguments for parse-page.py (default: --incremental)")
+    arguments = argument_parser.parse_args()
+
+    thread_watcher = ThreadWatcher(arguments)
+    try:
+        thread_watcher.watch()
+    finally:
+        thread_watcher.connection_pool.close()
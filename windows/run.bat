@@ -1 +1,7 @@
+@rem Download the thread, and calculate the standings only if it changed
+@rem (update-page.py exits with 3 if thread.html was not modified).
+@rem After editing tournament.txt or aux-data.json, run parse-page.py directly
+@py update-page.py
+@if %errorlevel% equ 3 if exist res.txt goto :eof
+@if %errorlevel% neq 0 if %errorlevel% neq 3 exit /b %errorlevel%
 @py parse-page.py > res.txt 2>err.txt
\ No newline at end of file
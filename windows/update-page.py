@@ -1,15 +1,108 @@
 #! /usr/bin/python3 
 
+# Download the thread into thread.html, only if it changed since the last time:
+# the ETag and Last-Modified of the last download are kept in thread.html.headers.json,
+# and a "304 Not Modified" answer leaves thread.html untouched, and exits
+# with status 3 (not_modified_status), so that run.bat skips parse-page.py.
+# The page is requested compressed, and transient failures are retried.
+
+import gzip
+import json
+import os
+import socket
+import sys
+import time
+import urllib.error
 import urllib.request
+import zlib
+
+try:
+	import brotli  # optional
+except ImportError:
+	brotli = None
 
 user_agent = "Mozilla/5.0 (Windows; U; Windows NT 5.1; en-US; rv:1.9.0.7) Gecko/2009021910 Firefox/3.0.7"
 
 url = "http://www.scacchierando.it/fantascacchi/fantatata-2020/"
-headers={"User-Agent":user_agent,} 
-
-request = urllib.request.Request(url,None,headers) 
-response = urllib.request.urlopen(request)
-data = response.read()
-	
-with open("thread.html", "wb") as file:
-	file.write(data)
+thread_filename = "thread.html"
+headers_filename = "thread.html.headers.json"
+
+max_attempts = 5
+
+# Exit status when thread.html did not change (errors exit with 1)
+not_modified_status = 3
+
+def load_validators():
+	# Only meaningful if the page they refer to is still there
+	if not os.path.exists(thread_filename):
+		return {}
+	try:
+		with open(headers_filename, "r", encoding = "utf-8") as file:
+			return json.load(file)
+	except (OSError, ValueError):
+		return {}
+
+def save_validators(response_headers):
+	validators = {}
+	if response_headers.get("ETag"):
+		validators["etag"] = response_headers["ETag"]
+	if response_headers.get("Last-Modified"):
+		validators["last_modified"] = response_headers["Last-Modified"]
+	with open(headers_filename, "w", encoding = "utf-8") as file:
+		json.dump(validators, file)
+
+def decode_body(data, content_encoding):
+	if content_encoding == "gzip":
+		return gzip.decompress(data)
+	elif content_encoding == "deflate":
+		return zlib.decompress(data)
+	elif content_encoding == "br":
+		return brotli.decompress(data)
+	return data
+
+def is_transient(error):
+	if isinstance(error, urllib.error.HTTPError):
+		return error.code == 429 or error.code >= 500
+	return isinstance(error, (urllib.error.URLError, socket.timeout, ConnectionError))
+
+def fetch(validators):
+	# Returns (None, None) if the page did not change
+	headers = {
+		"User-Agent" : user_agent,
+		"Accept-Encoding" : "gzip, deflate" + (", br" if brotli is not None else ""),
+		}
+	if "etag" in validators:
+		headers["If-None-Match"] = validators["etag"]
+	if "last_modified" in validators:
+		headers["If-Modified-Since"] = validators["last_modified"]
+
+	request = urllib.request.Request(url, None, headers)
+	for attempt in range(max_attempts):
+		try:
+			with urllib.request.urlopen(request, timeout = 30) as response:
+				data = decode_body(response.read(), response.headers.get("Content-Encoding", "identity"))
+				return data, response.headers
+		except urllib.error.HTTPError as error:
+			if error.code == 304:
+				return None, None
+			if not is_transient(error) or attempt == max_attempts - 1:
+				raise
+		except Exception as error:
+			if not is_transient(error) or attempt == max_attempts - 1:
+				raise
+
+		# Back off: 1, 2, 4, 8 seconds
+		time.sleep(2 ** attempt)
+
+data, response_headers = fetch(load_validators())
+
+if data is None:
+	print("thread.html not modified")
+	sys.exit(not_modified_status)
+else:
+	# Write to a temporary file first, so that an interrupted download
+	# cannot leave a truncated page behind
+	with open(thread_filename + ".tmp", "wb") as file:
+		file.write(data)
+	os.replace(thread_filename + ".tmp", thread_filename)
+	save_validators(response_headers)